@@ -0,0 +1,15 @@
+from rest_framework.authentication import TokenAuthentication
+
+from recipes.services.token_cache import cache_token, get_cached_token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    # Пользователь по токену берётся из кэша. Запись удаляется сигналами
+    # при выходе, смене пароля и любом изменении пользователя.
+    def authenticate_credentials(self, key):
+        cached = get_cached_token(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        cache_token(key, user, token)
+        return user, token
@@ -0,0 +1,69 @@
+import base64
+import binascii
+import uuid
+
+from django.core.files.base import ContentFile
+from PIL import Image
+from rest_framework import serializers
+
+IMAGE_EXTENSIONS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'GIF': 'gif',
+    'WEBP': 'webp',
+}
+
+
+class Base64ImageUploadField(serializers.ImageField):
+    # В запросе base64 только декодируется и читается заголовок картинки.
+    # Пережатие и уменьшенные копии делает фоновая задача
+    # (recipes.services.images.process_image).
+    default_error_messages = {
+        'invalid_image': 'Загрузите корректное изображение.',
+    }
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str) or not data:
+            self.fail('invalid_image')
+        data = data.rpartition(';base64,')[2]
+        try:
+            file = ContentFile(base64.b64decode(data))
+        except (binascii.Error, ValueError):
+            self.fail('invalid_image')
+        try:
+            with Image.open(file) as image:
+                image_format = image.format
+                width, height = image.size
+        except (OSError, Image.DecompressionBombError):
+            self.fail('invalid_image')
+        if (image_format not in IMAGE_EXTENSIONS
+                or width * height > Image.MAX_IMAGE_PIXELS):
+            self.fail('invalid_image')
+        file.seek(0)
+        file.name = f'{uuid.uuid4()}.{IMAGE_EXTENSIONS[image_format]}'
+        return file
+
+
+class ImageRenditionField(serializers.Field):
+    # Отдаёт URL уменьшенной копии, а пока её нет — оригинала.
+    def __init__(self, rendition=None, image_field='image',
+                 renditions_field='image_renditions', **kwargs):
+        self.rendition = rendition
+        self.image_field = image_field
+        self.renditions_field = renditions_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        image = getattr(instance, self.image_field)
+        if not image:
+            return None
+        rendition = self.rendition or self.context.get('image_rendition')
+        name = getattr(instance, self.renditions_field).get(
+            rendition, image.name)
+        url = image.storage.url(name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
@@ -0,0 +1,77 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+    quote_etag
+)
+
+from recipes.services.versions import get_version
+
+MAX_RENDERED_PAYLOADS = 256
+
+
+class CatalogCacheMixin:
+    # Версия справочника меняется сигналами. JSON-ответы текущей версии
+    # хранятся в памяти процесса уже отрендеренными.
+    catalog_version_key = None
+
+    _rendered = {}
+    _rendered_lock = threading.Lock()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_catalog_response(
+            self.list_catalog, request, *args, **kwargs)
+
+    def list_catalog(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_catalog_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_catalog_response(self, handler, request, *args, **kwargs):
+        # Браузерный API зависит от пользователя, его не кэшируем.
+        if request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        version = get_version(self.catalog_version_key)
+        path = request.get_full_path()
+        etag = quote_etag(
+            hashlib.md5(f'{version}:{path}'.encode()).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.get_rendered_response(
+                handler, version, path, request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_cache_control(response, public=True,
+                                max_age=settings.CATALOG_CACHE_MAX_AGE)
+            patch_vary_headers(response, ('Accept',))
+        return response
+
+    def get_rendered_response(self, handler, version, path, request, *args,
+                              **kwargs):
+        rendered = self._rendered.get(self.catalog_version_key)
+        if rendered is not None and rendered['version'] == version:
+            content = rendered['payloads'].get(path)
+            if content is not None:
+                return HttpResponse(content,
+                                    content_type='application/json')
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        content = request.accepted_renderer.render(
+            response.data, request.accepted_media_type,
+            self.get_renderer_context())
+        with self._rendered_lock:
+            rendered = self._rendered.get(self.catalog_version_key)
+            if rendered is None or rendered['version'] != version:
+                rendered = {'version': version, 'payloads': {}}
+                self._rendered[self.catalog_version_key] = rendered
+            if len(rendered['payloads']) < MAX_RENDERED_PAYLOADS:
+                rendered['payloads'][path] = content
+        return HttpResponse(content, content_type='application/json')
@@ -1,15 +1,97 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from recipes.constants import MAX_PAGE_SIZE
+
+PAGE_SIZE = 6
+
+
+class FeedCursorPagination(CursorPagination):
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+    ordering = ('-pub_date', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        # Порядок может зависеть от запроса (например, ordering=popular):
+        # курсор обязан строиться по тому же порядку, что и выдача.
+        get_cursor_ordering = getattr(view, 'get_cursor_ordering', None)
+        if get_cursor_ordering is not None:
+            return get_cursor_ordering()
+        return getattr(view, 'cursor_ordering', self.ordering)
 
 
 class LimitPageNumberPagination(PageNumberPagination):
-    page_size = 6
+    page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+    count_query_param = 'count'
+    mode_query_param = 'pagination'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        self.has_next = None
+        if self.is_cursor_mode(request):
+            self.cursor_paginator = FeedCursorPagination()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        if request.query_params.get(self.count_query_param) in (
+                '0', 'false'):
+            return self.paginate_without_count(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
 
-    def get_page_size(self, request):
+    def is_cursor_mode(self, request):
+        return (FeedCursorPagination.cursor_query_param in request.query_params
+                or request.query_params.get(self.mode_query_param)
+                == 'cursor')
+
+    def paginate_without_count(self, queryset, request):
+        page_size = self.get_page_size(request)
         try:
-            print(int(request.query_params.get(self.page_size_query_param,
-                                               self.page_size)))
-            return int(request.query_params.get(self.page_size_query_param,
-                                                self.page_size))
-        except (TypeError, ValueError):
-            return self.page_size
+            page_number = int(request.query_params.get(
+                self.page_query_param, 1))
+            if page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params.get(self.page_query_param),
+                message='Неверный номер страницы.'))
+        offset = (page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and page_number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message='Страница пуста.'))
+        self.request = request
+        self.page_number = page_number
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return Response(OrderedDict([
+                ('count', None),
+                ('next', self.cursor_paginator.get_next_link()),
+                ('previous', self.cursor_paginator.get_previous_link()),
+                ('results', data),
+            ]))
+        if self.has_next is not None:
+            url = self.request.build_absolute_uri()
+            previous_link = None
+            if self.page_number == 2:
+                previous_link = remove_query_param(url, self.page_query_param)
+            elif self.page_number > 2:
+                previous_link = replace_query_param(
+                    url, self.page_query_param, self.page_number - 1)
+            return Response(OrderedDict([
+                ('count', None),
+                ('next', replace_query_param(
+                    url, self.page_query_param, self.page_number + 1
+                ) if self.has_next else None),
+                ('previous', previous_link),
+                ('results', data),
+            ]))
+        return super().get_paginated_response(data)
@@ -1,21 +1,50 @@
+from django import forms
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 from rest_framework.filters import SearchFilter
 
 from recipes.models import Recipe
+from recipes.services.catalog import get_tag_ids
 
 User = get_user_model()
 
+POPULAR_ORDERING = ('-favorites_count', '-pub_date', '-id')
+
 
 class IngredientSearchFilter(SearchFilter):
     search_param = 'name'
 
 
+class SlugsField(forms.MultipleChoiceField):
+    # Список допустимых slug'ов не строится: неизвестные тэги просто
+    # не находят рецептов.
+    def valid_value(self, value):
+        return True
+
+
+class TagsFilter(filters.Filter):
+    field_class = SlugsField
+
+    def filter(self, queryset, value):
+        if not value:
+            return queryset
+        tag_ids = get_tag_ids(value)
+        if not tag_ids:
+            return queryset.none()
+        # Подзапрос вместо JOIN: рецепт с несколькими подходящими тэгами
+        # попадает в выдачу один раз и без DISTINCT.
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'), tag_id__in=tag_ids)))
+
+
 class AuthorAndTagFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = TagsFilter()
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart')
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'popular'),), method='filter_ordering')
 
     def filter_is_favorited(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
@@ -28,6 +57,9 @@ class AuthorAndTagFilter(FilterSet):
                 shoppinglist_recipes__user=self.request.user)
         return queryset
 
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(*POPULAR_ORDERING)
+
     class Meta:
         model = Recipe
         fields = ('tags', 'author')
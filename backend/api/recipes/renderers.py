@@ -0,0 +1,22 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from recipes.services.shopping_cart_exporters import EXPORTERS
+
+
+class ShoppingCartRenderer(BaseRenderer):
+    # Выгрузку отдаёт экспортёр, через рендерер проходят только ошибки
+    # и статусы задач: это JSON, и Content-Type должен это говорить.
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = JSONRenderer.media_type
+        return JSONRenderer().render(data)
+
+
+def get_shopping_cart_renderers():
+    return [
+        type(f'{exporter.__class__.__name__}Renderer',
+             (ShoppingCartRenderer,),
+             {'format': export_format, 'media_type': exporter.media_type})
+        for export_format, exporter in EXPORTERS.items()
+    ]
@@ -1,14 +1,19 @@
 from rest_framework import serializers
-from drf_extra_fields.fields import Base64ImageField
 from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from django.shortcuts import get_object_or_404
 
 from recipes.constants import (
     MAX_COOKING_TIME, MAX_INGREDIENTS,
-    MIN_COOKING_TIME, MIN_INGREDIENTS)
+    MIN_COOKING_TIME, MIN_INGREDIENTS,
+    RECIPE_IMAGE_MAX_SIZE, RECIPE_IMAGE_RENDITIONS)
 from recipes.models import (
-    Ingredient, IngredientInRecipe, Recipe, ShoppingList, Tag, Favorite
+    Ingredient, IngredientInRecipe, Recipe, ShoppingCartExport,
+    ShoppingList, Tag, Favorite
 )
+from recipes.services.images import enqueue_image_processing
+from api.fields import Base64ImageUploadField, ImageRenditionField
+from api.viewer import get_viewer
 from api.users.serializers import UserSerializer
 
 
@@ -24,13 +29,25 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class PrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    # Возвращает pk без запроса к БД: объекты разрешаются одним in_bulk
+    # в RecipeWriteSerializer.validate.
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
 class IngredientInRecipeSerializer(serializers.ModelSerializer):
     amount = serializers.IntegerField(
         required=True,
         min_value=MIN_INGREDIENTS,
         max_value=MAX_INGREDIENTS
     )
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = PrimaryKeyField(queryset=Ingredient.objects.all())
     name = serializers.ReadOnlyField(source='ingredient.name')
     measurement_unit = serializers.ReadOnlyField(
         source='ingredient.measurement_unit')
@@ -47,6 +64,7 @@ class RecipeGetSerializer(serializers.ModelSerializer):
                                                source='recipes_ingredients')
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image = ImageRenditionField()
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -56,18 +74,18 @@ class RecipeGetSerializer(serializers.ModelSerializer):
         return data
 
     def get_is_favorited(self, obj):
-        request = self.context['request']
-        if request.user.is_authenticated:
-            return request.user.favoriteuser.filter(
-                recipe=obj).exists()
-        return False
+        is_favorited = getattr(obj, 'is_favorited', None)
+        if is_favorited is not None:
+            return is_favorited
+        viewer = get_viewer(self.context)
+        return viewer is not None and obj.id in viewer.favorite_ids
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context['request']
-        if request.user.is_authenticated:
-            return request.user.shoppinglist_users.filter(
-                recipe=obj).exists()
-        return False
+        is_in_shopping_cart = getattr(obj, 'is_in_shopping_cart', None)
+        if is_in_shopping_cart is not None:
+            return is_in_shopping_cart
+        viewer = get_viewer(self.context)
+        return viewer is not None and obj.id in viewer.cart_ids
 
     class Meta:
         model = Recipe
@@ -79,7 +97,7 @@ class RecipeGetSerializer(serializers.ModelSerializer):
 
 
 class RecipeWriteSerializer(RecipeGetSerializer):
-    image = Base64ImageField(required=True)
+    image = Base64ImageUploadField(required=True)
     is_favorited = serializers.BooleanField(default=False)
     is_in_shopping_cart = serializers.BooleanField(default=False)
     cooking_time = serializers.IntegerField(
@@ -89,46 +107,37 @@ class RecipeWriteSerializer(RecipeGetSerializer):
     )
     ingredients = IngredientInRecipeSerializer(many=True,
                                                source='recipes_ingredients')
-    tags = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all(),
-                                              many=True)
+    tags = PrimaryKeyField(queryset=Tag.objects.all(), many=True)
 
     def validate(self, data):
         super().validate(data)
 
-        request = self.context['request']
-        get_tags = request.data.get('tags')
-
-        if not get_tags:
+        tag_ids = data.get('tags')
+        if not tag_ids:
             raise serializers.ValidationError({'tags': ['Обязательное поле.']})
+        if len(set(tag_ids)) != len(tag_ids):
+            raise serializers.ValidationError(
+                {'tags': ['Такой тэг уже есть.']})
+        tags = Tag.objects.in_bulk(tag_ids)
+        if len(tags) != len(tag_ids):
+            raise serializers.ValidationError(
+                {'tags': ['Такого тэга нет.']})
+        data['tags'] = [tags[tag_id] for tag_id in tag_ids]
 
-        tags_data = set()
-        for tag_data in get_tags:
-            try:
-                tag = Tag.objects.get(pk=tag_data)
-                if tag in tags_data:
-                    raise serializers.ValidationError(
-                        {'tags': ['Такой тэг уже есть.']})
-                tags_data.add(tag)
-            except Tag.DoesNotExist:
-                raise serializers.ValidationError(
-                    {'tags': ['Такого тэга нет.']})
-
-        get_ingredients = request.data.get('ingredients')
-        if not get_ingredients:
+        ingredients_data = data.get('recipes_ingredients')
+        if not ingredients_data:
             raise serializers.ValidationError(
                 {'ingredients': ['Обязательное поле.']})
-
-        ingredients_set = set()
-        for ingredient in get_ingredients:
-            if ingredient['id'] in ingredients_set:
-                raise serializers.ValidationError(
-                    {'ingredients': ['Такой id занят.']})
-            ingredients_set.add(ingredient['id'])
-            try:
-                Ingredient.objects.get(id=ingredient['id'])
-            except Ingredient.DoesNotExist:
-                raise serializers.ValidationError(
-                    {'ingredients': ['Такого ингредиента нет.']})
+        ingredient_ids = [item['id'] for item in ingredients_data]
+        if len(set(ingredient_ids)) != len(ingredient_ids):
+            raise serializers.ValidationError(
+                {'ingredients': ['Такой id занят.']})
+        ingredients = Ingredient.objects.in_bulk(ingredient_ids)
+        if len(ingredients) != len(ingredient_ids):
+            raise serializers.ValidationError(
+                {'ingredients': ['Такого ингредиента нет.']})
+        for item in ingredients_data:
+            item['ingredient'] = ingredients[item['id']]
 
         return data
 
@@ -138,26 +147,52 @@ class RecipeWriteSerializer(RecipeGetSerializer):
         return value
 
     def create_ingredients(self, ingredients_data, recipe):
-        for ingredient_data in ingredients_data:
-            ingredient_id = ingredient_data['id']
-            ingredient = Ingredient.objects.get(pk=ingredient_id)
-            amount = ingredient_data['amount']
-            IngredientInRecipe.objects.create(
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
                 recipe=recipe,
-                ingredient=ingredient,
-                amount=amount
+                ingredient=ingredient_data['ingredient'],
+                amount=ingredient_data['amount']
             )
+            for ingredient_data in ingredients_data
+        )
+        return recipe
+
+    def update_ingredients(self, ingredients_data, recipe):
+        existing = {
+            row.ingredient_id: row
+            for row in recipe.recipes_ingredients.all()
+        }
+        new_data = []
+        changed = []
+        for ingredient_data in ingredients_data:
+            row = existing.pop(ingredient_data['ingredient'].id, None)
+            if row is None:
+                new_data.append(ingredient_data)
+            elif row.amount != ingredient_data['amount']:
+                row.amount = ingredient_data['amount']
+                changed.append(row)
+        if existing:
+            IngredientInRecipe.objects.filter(
+                pk__in=[row.pk for row in existing.values()]).delete()
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ['amount'])
+        self.create_ingredients(new_data, recipe)
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        validated_data.pop('recipes_ingredients')
+        validated_data.pop('is_favorited', None)
+        validated_data.pop('is_in_shopping_cart', None)
+        ingredients_data = validated_data.pop('recipes_ingredients')
         tags_data = validated_data.pop('tags')
+        if 'image' in validated_data:
+            validated_data['image_renditions'] = {}
         super().update(instance, validated_data)
         instance.tags.set(tags_data)
-        instance.ingredients.clear()
-        ingredients = self.initial_data.get('ingredients')
-        self.create_ingredients(ingredients, instance)
+        self.update_ingredients(ingredients_data, instance)
+        if 'image' in validated_data:
+            enqueue_image_processing(instance, RECIPE_IMAGE_MAX_SIZE,
+                                     RECIPE_IMAGE_RENDITIONS)
         return instance
 
     @transaction.atomic
@@ -165,14 +200,19 @@ class RecipeWriteSerializer(RecipeGetSerializer):
         validated_data.pop('is_favorited', None)
         validated_data.pop('is_in_shopping_cart', None)
         tags_data = validated_data.pop('tags')
-        validated_data.pop('recipes_ingredients')
+        ingredients_data = validated_data.pop('recipes_ingredients')
         recipe = Recipe.objects.create(**validated_data)
-        ingredients = self.initial_data.get('ingredients')
-        self.create_ingredients(ingredients, recipe)
+        self.create_ingredients(ingredients_data, recipe)
         recipe.tags.set(tags_data)
+        enqueue_image_processing(recipe, RECIPE_IMAGE_MAX_SIZE,
+                                 RECIPE_IMAGE_RENDITIONS)
         return recipe
 
     def to_representation(self, instance):
+        prefetch_related_objects([instance], 'tags', Prefetch(
+            'recipes_ingredients',
+            queryset=IngredientInRecipe.objects.select_related('ingredient')
+        ))
         data = super().to_representation(instance)
         data['tags'] = TagSerializer(instance.tags.all(), many=True).data
         data['is_favorited'] = self.get_is_favorited(instance)
@@ -181,7 +221,7 @@ class RecipeWriteSerializer(RecipeGetSerializer):
 
 
 class CropRecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+    image = ImageRenditionField(rendition='thumb')
 
     class Meta:
         model = Recipe
@@ -230,3 +270,9 @@ class FavoriteSerializer(ShoppingListSerializer):
         model = Favorite
         fields = ('recipes',)
         read_only_fields = ('user', 'recipes')
+
+
+class ShoppingCartExportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ShoppingCartExport
+        fields = ('id', 'format', 'status', 'created')
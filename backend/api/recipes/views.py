@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.viewsets import ReadOnlyModelViewSet
@@ -8,32 +11,57 @@ from rest_framework.permissions import (
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 
-from api.recipes.filters import AuthorAndTagFilter, IngredientSearchFilter
-from api.pagination import LimitPageNumberPagination
+from api.mixins import CatalogCacheMixin
+from api.recipes.filters import (
+    POPULAR_ORDERING, AuthorAndTagFilter, IngredientSearchFilter
+)
+from api.recipes.renderers import get_shopping_cart_renderers
+from api.pagination import FeedCursorPagination, LimitPageNumberPagination
 from api.permissions import IsOwnerOrReadOnly
 from api.recipes.serializers import (
     CropRecipeSerializer, IngredientSerializer,
-    TagSerializer,
+    ShoppingCartExportSerializer, TagSerializer,
     RecipeWriteSerializer, RecipeGetSerializer)
 from recipes.models import (
-    ShoppingList, Favorite, Ingredient, Recipe, Tag
+    ShoppingCartExport, ShoppingList, Favorite, Ingredient,
+    IngredientInRecipe, Recipe, Tag
+)
+from recipes.services.catalog import (
+    INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY
 )
-from recipes.services.generate_shopping_cart import generate_shopping_cart_pdf
+from recipes.services.ingredient_index import search_ingredients
+from recipes.services.recipe_cache import get_recipes_data
+from recipes.services.shopping_cart_cache import export_shopping_cart
+from recipes.services.shopping_cart_exporters import get_exporter
+from recipes.services.shopping_cart_jobs import enqueue_export, get_export
+from users.models import Follow
 
 
-class TagsViewSet(ReadOnlyModelViewSet):
+class TagsViewSet(CatalogCacheMixin, ReadOnlyModelViewSet):
+    catalog_version_key = TAGS_VERSION_KEY
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
 
-class IngredientsViewSet(ReadOnlyModelViewSet):
+class IngredientsViewSet(CatalogCacheMixin, ReadOnlyModelViewSet):
+    catalog_version_key = INGREDIENTS_VERSION_KEY
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
     filter_backends = [IngredientSearchFilter]
     search_fields = ('^name',)
 
+    def list_catalog(self, request, *args, **kwargs):
+        name = request.query_params.get(IngredientSearchFilter.search_param)
+        if name:
+            ingredients = search_ingredients(
+                name, settings.INGREDIENT_SEARCH_LIMIT,
+                ranked=request.query_params.get('mode') != 'prefix')
+            if ingredients is not None:
+                return Response(ingredients)
+        return super().list_catalog(request, *args, **kwargs)
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
@@ -42,6 +70,84 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filterset_class = AuthorAndTagFilter
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        # Представление рецепта берётся из кэша, из БД читаются только
+        # id для страницы, поля курсора и флаги текущего пользователя.
+        queryset = self.annotate_viewer_flags(queryset, self.request.user)
+        return queryset.values('id', 'author_id', 'pub_date',
+                               'favorites_count',
+                               *queryset.query.annotations)
+
+    def get_cursor_ordering(self):
+        if self.request.query_params.get('ordering') == 'popular':
+            return POPULAR_ORDERING
+        return FeedCursorPagination.ordering
+
+    @staticmethod
+    def annotate_viewer_flags(queryset, user):
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(ShoppingList.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_subscribed=Exists(Follow.objects.filter(
+                subscriber=user, user=OuterRef('author_id'))),
+        )
+
+    @staticmethod
+    def serialize_recipes(ids, rendition):
+        recipes = Recipe.objects.filter(id__in=ids).select_related(
+            'author'
+        ).prefetch_related('tags', Prefetch(
+            'recipes_ingredients',
+            queryset=IngredientInRecipe.objects.select_related('ingredient')
+        ))
+        data = RecipeGetSerializer(
+            recipes, many=True, context={'image_rendition': rendition}).data
+        return {item['id']: item for item in data}
+
+    def get_recipes_data(self, rows):
+        rendition = 'card' if self.action == 'list' else None
+        data = get_recipes_data(
+            rows, rendition,
+            lambda ids: self.serialize_recipes(ids, rendition))
+        return [
+            self.add_viewer_data(data[row['id']], row)
+            for row in rows if row['id'] in data
+        ]
+
+    def add_viewer_data(self, item, row):
+        build_url = self.request.build_absolute_uri
+        author = dict(item['author'])
+        author['is_subscribed'] = row.get('is_subscribed', False)
+        if author['avatar']:
+            author['avatar'] = build_url(author['avatar'])
+        return {
+            **item,
+            'author': author,
+            'is_favorited': row.get('is_favorited', False),
+            'is_in_shopping_cart': row.get('is_in_shopping_cart', False),
+            'image': build_url(item['image']) if item['image'] else None,
+        }
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(self.get_recipes_data(list(queryset)))
+        return self.get_paginated_response(self.get_recipes_data(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        data = self.get_recipes_data([self.get_object()])
+        if not data:
+            raise Http404
+        return Response(data[0])
+
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipeGetSerializer
@@ -69,9 +175,43 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return self.delete_obj(ShoppingList, request.user, pk)
 
     @action(detail=False, methods=['get'],
-            permission_classes=[IsAuthenticated])
+            permission_classes=[IsAuthenticated],
+            renderer_classes=get_shopping_cart_renderers())
     def download_shopping_cart(self, request):
-        return generate_shopping_cart_pdf(request.user)
+        exporter = get_exporter(request.accepted_renderer.format)
+        if request.query_params.get('async') in ('1', 'true'):
+            job = enqueue_export(request.user, exporter.format)
+            return Response(
+                ShoppingCartExportSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED,
+                content_type='application/json'
+            )
+        return export_shopping_cart(request, exporter)
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[IsAuthenticated],
+            url_path=r'download_shopping_cart/(?P<job_id>[0-9a-f-]{36})')
+    def download_shopping_cart_job(self, request, job_id):
+        job = get_export(request.user, job_id)
+        if job is None:
+            return Response({
+                'errors': 'Выгрузка не найдена'
+            }, status=status.HTTP_404_NOT_FOUND)
+        if job.status != ShoppingCartExport.Status.DONE:
+            # Упавшая выгрузка — готовый ответ на запрос статуса, а не
+            # ошибка сервера: 200 и "status": "failed" в теле.
+            return Response(
+                ShoppingCartExportSerializer(job).data,
+                status=(status.HTTP_200_OK
+                        if job.status == ShoppingCartExport.Status.FAILED
+                        else status.HTTP_202_ACCEPTED)
+            )
+        exporter = get_exporter(job.format)
+        return FileResponse(
+            job.file.open('rb'), as_attachment=True,
+            filename=f'shopping_list.{job.format}',
+            content_type=exporter.content_type
+        )
 
     def add_obj(self, model, user, pk):
         if model.objects.filter(user=user, recipe__id=pk).exists():
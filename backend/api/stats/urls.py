@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import CacheStatsView, MetricsView
+
+app_name = 'stats'
+
+urlpatterns = [
+    path('cache/', CacheStatsView.as_view(), name='cache'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+]
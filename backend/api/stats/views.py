@@ -0,0 +1,28 @@
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from backend.metrics import render_metrics
+from recipes.cache import get_stats, reset_stats
+
+
+class CacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_stats())
+
+    def delete(self, request):
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MetricsView(APIView):
+    # Текстовый формат Prometheus.
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(render_metrics(),
+                            content_type='text/plain; version=0.0.4')
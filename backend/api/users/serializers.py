@@ -1,15 +1,17 @@
-from django.core.files.base import ContentFile
 from django.core.validators import RegexValidator
 from rest_framework.validators import UniqueValidator
 from rest_framework import serializers
-from drf_extra_fields.fields import Base64ImageField
 from djoser.serializers import (
     UserSerializer as DjoserUserSerializer,
     UserCreateSerializer as DjoserUserCreateSerializer
 )
-from users.constants import (NAME_LENGTH)
+from users.constants import (AVATAR_MAX_SIZE, NAME_LENGTH)
 
+from api.fields import Base64ImageUploadField
+from api.viewer import get_viewer
+from recipes.constants import MAX_RECIPES_LIMIT
 from recipes.models import Recipe
+from recipes.services.images import enqueue_image_processing
 from users.models import Follow, User
 
 
@@ -38,6 +40,12 @@ class UserCreateSerializer(DjoserUserCreateSerializer):
         }
 
 
+def get_latest_recipes():
+    # Общий порядок для subscribe и subscriptions: при одинаковой дате
+    # публикации «последние N» не должны различаться.
+    return Recipe.objects.order_by('-pub_date', '-id')
+
+
 class FollowSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='user.id')
     email = serializers.ReadOnlyField(source='user.email')
@@ -46,7 +54,7 @@ class FollowSerializer(serializers.ModelSerializer):
     last_name = serializers.ReadOnlyField(source='user.last_name')
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField(source='user.recipes_count')
     avatar = serializers.ReadOnlyField(source='user.avatar_url')
 
     class Meta:
@@ -55,31 +63,33 @@ class FollowSerializer(serializers.ModelSerializer):
                   'is_subscribed', 'recipes', 'recipes_count', 'avatar')
 
     def get_is_subscribed(self, obj):
-        return Follow.objects.filter(
-            subscriber=obj.subscriber, user=obj.user
-        ).exists()
+        return True
 
     def get_recipes(self, obj):
         from api.recipes.serializers import CropRecipeSerializer
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        queryset = Recipe.objects.filter(author=obj.user)
-        if limit:
-            queryset = queryset[:int(limit)]
-        return CropRecipeSerializer(queryset, many=True).data
+        recipes = getattr(obj.user, 'limited_recipes', None)
+        if recipes is None:
+            recipes = get_latest_recipes().filter(author=obj.user)[
+                :self.context.get('recipes_limit', MAX_RECIPES_LIMIT)]
+        return CropRecipeSerializer(recipes, many=True).data
+
+
+class RecipesLimitSerializer(serializers.Serializer):
+    recipes_limit = serializers.IntegerField(min_value=0, required=False)
 
-    def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.user).count()
+    def validate_recipes_limit(self, value):
+        return min(value, MAX_RECIPES_LIMIT)
 
 
 class UserSerializer(DjoserUserSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return user.subscribers.filter(user=obj).exists()
+        is_subscribed = getattr(obj, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
+        viewer = get_viewer(self.context)
+        return viewer is not None and obj.id in viewer.followed_ids
 
     class Meta:
         model = User
@@ -89,12 +99,14 @@ class UserSerializer(DjoserUserSerializer):
 
 
 class AvatarSerializer(serializers.ModelSerializer):
-    avatar = Base64ImageField(required=True)
+    avatar = Base64ImageUploadField(required=True)
 
     def update(self, instance, validated_data):
-        avatar_data = validated_data.get('avatar', None)
-        file_avatar = ContentFile(avatar_data.read())
-        instance.avatar.save('image.png', file_avatar, save=True)
+        avatar = validated_data['avatar']
+        instance.avatar.save(avatar.name, avatar, save=False)
+        instance.save(update_fields=('avatar',))
+        enqueue_image_processing(instance, AVATAR_MAX_SIZE,
+                                 image_field='avatar')
         return instance
 
     def validate_avatar(self, avatar_data):
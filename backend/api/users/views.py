@@ -1,3 +1,4 @@
+from django.db.models import Exists, OuterRef, Prefetch
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.decorators import action
@@ -7,24 +8,42 @@ from djoser.views import UserViewSet as DjoserViewSet
 
 from api.pagination import LimitPageNumberPagination
 from api.users.serializers import (
-    FollowSerializer,
-    AvatarSerializer, UserSerializer)
+    FollowSerializer, RecipesLimitSerializer,
+    AvatarSerializer, UserSerializer, get_latest_recipes)
 
+from recipes.constants import MAX_RECIPES_LIMIT
 from users.models import Follow, User
 
 
 class UserViewSet(DjoserViewSet):
     pagination_class = LimitPageNumberPagination
     serializer_class = UserSerializer
+    cursor_ordering = ('-id',)
 
     def get_permissions(self):
         if self.action == 'me':
             self.permission_classes = [IsAuthenticated]
         return super().get_permissions()
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(is_subscribed=Exists(
+            Follow.objects.filter(subscriber=user, user=OuterRef('pk'))))
+
+    def get_recipes_limit(self):
+        serializer = RecipesLimitSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data.get(
+            'recipes_limit', MAX_RECIPES_LIMIT)
+
     @action(detail=True, permission_classes=[IsAuthenticated],
             methods=['post'])
     def subscribe(self, request, id=None):
+        # Параметры проверяем до записи: ошибка не должна оставлять подписку.
+        recipes_limit = self.get_recipes_limit()
         user = request.user
         author = get_object_or_404(User, id=id)
 
@@ -39,7 +58,8 @@ class UserViewSet(DjoserViewSet):
 
         follow = Follow.objects.create(subscriber=user, user=author)
         serializer = FollowSerializer(
-            follow, context={'request': request}
+            follow, context={'request': request,
+                             'recipes_limit': recipes_limit}
         )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -63,12 +83,19 @@ class UserViewSet(DjoserViewSet):
     @action(detail=False, permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
         user = request.user
-        queryset = Follow.objects.filter(subscriber=user)
+        recipes_limit = self.get_recipes_limit()
+        queryset = Follow.objects.filter(subscriber=user).select_related(
+            'user'
+        ).prefetch_related(Prefetch(
+            'user__recipes',
+            queryset=get_latest_recipes()[:recipes_limit],
+            to_attr='limited_recipes'
+        ))
         pages = self.paginate_queryset(queryset)
         serializer = FollowSerializer(
             pages,
             many=True,
-            context={'request': request}
+            context={'request': request, 'recipes_limit': recipes_limit}
         )
         return self.get_paginated_response(serializer.data)
 
@@ -85,5 +112,10 @@ class UserViewSet(DjoserViewSet):
     @avatar.mapping.delete
     def delete_avatar(self, request, *args, **kwargs):
         user = self.request.user
-        user.avatar.delete()
+        name = user.avatar.name
+        user.avatar = None
+        user.save(update_fields=('avatar',))
+        # Удаляем после сохранения: хранилище не трогает файлы,
+        # на которые ещё есть ссылки.
+        user.avatar.storage.delete(name)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,46 @@
+from functools import cached_property
+
+from recipes.models import Favorite, ShoppingList
+from users.models import Follow
+
+
+class ViewerContext:
+    # Связи текущего пользователя: каждый вид загружается одним запросом
+    # при первом обращении и дальше проверяется по множеству id.
+    # Изменения, сделанные позже в этом же запросе, не видны.
+    def __init__(self, user):
+        self.user = user
+
+    def get_ids(self, queryset, field):
+        if self.user.is_anonymous:
+            return frozenset()
+        return frozenset(queryset.order_by().values_list(field, flat=True))
+
+    @cached_property
+    def favorite_ids(self):
+        return self.get_ids(Favorite.objects.filter(user=self.user),
+                            'recipe_id')
+
+    @cached_property
+    def cart_ids(self):
+        return self.get_ids(ShoppingList.objects.filter(user=self.user),
+                            'recipe_id')
+
+    @cached_property
+    def followed_ids(self):
+        return self.get_ids(Follow.objects.filter(subscriber=self.user),
+                            'user_id')
+
+
+def get_viewer(context):
+    # Один ViewerContext на HTTP-запрос: его делят все сериализаторы
+    # ответа, в том числе вложенные.
+    request = context.get('request')
+    if request is None:
+        return None
+    http_request = getattr(request, '_request', request)
+    viewer = getattr(http_request, 'viewer_context', None)
+    if viewer is None or viewer.user is not request.user:
+        viewer = ViewerContext(request.user)
+        http_request.viewer_context = viewer
+    return viewer
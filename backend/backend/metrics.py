@@ -0,0 +1,118 @@
+import bisect
+import threading
+from collections import Counter
+
+# Метрики хранятся в памяти процесса: каждый воркер gunicorn отдаёт
+# свои, суммирует их Prometheus.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_lock = threading.Lock()
+
+
+def escape_label(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def format_labels(labels):
+    return ','.join(f'{name}="{escape_label(value)}"'
+                    for name, value in labels)
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        # labels -> [счётчики по корзинам (последняя — +Inf), сумма]
+        self.values = {}
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} histogram']
+        with _lock:
+            values = {labels: list(counts)
+                      for labels, counts in self.values.items()}
+        for labels, counts in sorted(values.items()):
+            prefix = format_labels(labels)
+            total = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                total += count
+                lines.append(f'{self.name}_bucket{{{prefix},le="{bound}"}} '
+                             f'{total}')
+            lines.append(f'{self.name}_sum{{{prefix}}} {counts[-1]:g}')
+            lines.append(f'{self.name}_count{{{prefix}}} {total}')
+        return lines
+
+
+class CounterMetric:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.values = Counter()
+
+    def inc(self, labels):
+        with _lock:
+            self.values[labels] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} counter']
+        with _lock:
+            values = dict(self.values)
+        for labels, count in sorted(values.items()):
+            lines.append(f'{self.name}{{{format_labels(labels)}}} {count}')
+        return lines
+
+
+REQUESTS = CounterMetric(
+    'foodgram_http_requests_total', 'HTTP requests by view and status.')
+DURATION = Histogram(
+    'foodgram_http_request_duration_seconds', 'Request duration.',
+    DURATION_BUCKETS)
+QUERIES = Histogram(
+    'foodgram_http_request_queries', 'SQL queries per request.',
+    QUERY_COUNT_BUCKETS)
+QUERY_TIME = Histogram(
+    'foodgram_http_request_query_seconds', 'Total SQL time per request.',
+    DURATION_BUCKETS)
+SLOWEST_QUERY = Histogram(
+    'foodgram_http_request_slowest_query_seconds',
+    'Slowest SQL statement per request.', DURATION_BUCKETS)
+RESPONSE_SIZE = Histogram(
+    'foodgram_http_response_size_bytes', 'Response body size.',
+    SIZE_BUCKETS)
+
+METRICS = (REQUESTS, DURATION, QUERIES, QUERY_TIME, SLOWEST_QUERY,
+           RESPONSE_SIZE)
+
+
+def observe_request(view, status, duration, queries, query_time,
+                    slowest_query, size):
+    labels = (('view', view),)
+    REQUESTS.inc((('view', view), ('status', status)))
+    DURATION.observe(labels, duration)
+    QUERIES.observe(labels, queries)
+    QUERY_TIME.observe(labels, query_time)
+    if queries:
+        SLOWEST_QUERY.observe(labels, slowest_query)
+    if size is not None:
+        RESPONSE_SIZE.observe(labels, size)
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,99 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from backend.loggers import logger
+from backend.metrics import observe_request
+
+# Сколько запросов SQL сохраняется для лога медленного запроса.
+MAX_LOGGED_QUERIES = 50
+
+
+class QueryRecorder:
+    # execute_wrapper: считает запросы и их время, для выбранных
+    # в выборку запросов запоминает текст SQL (без параметров).
+    def __init__(self, keep_sql):
+        self.keep_sql = keep_sql
+        self.count = 0
+        self.time = 0
+        self.slowest_time = 0
+        self.slowest_sql = None
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.time += duration
+            if duration > self.slowest_time:
+                self.slowest_time = duration
+                self.slowest_sql = sql
+            if self.keep_sql and len(self.statements) < MAX_LOGGED_QUERIES:
+                self.statements.append((duration, sql))
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = match.func
+    view_class = getattr(view, 'cls', None)
+    if view_class is None:
+        return f'{view.__module__}.{view.__name__}'
+    # У ViewSet действие зависит от метода: list/create, retrieve/update.
+    actions = getattr(view, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def get_response_size(response):
+    if response.streaming:
+        length = response.get('Content-Length')
+        return int(length) if length else None
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    # Время ответа, число и время SQL-запросов, размер ответа по каждому
+    # view. Медленные запросы попадают в лог вместе с SQL, но только
+    # из выборки METRICS_SLOW_SAMPLE_RATE.
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        keep_sql = random.random() < settings.METRICS_SLOW_SAMPLE_RATE
+        recorder = QueryRecorder(keep_sql)
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        view = get_view_name(request)
+        observe_request(view, response.status_code, duration, recorder.count,
+                        recorder.time, recorder.slowest_time,
+                        get_response_size(response))
+        if keep_sql and duration * 1000 >= settings.METRICS_SLOW_REQUEST_MS:
+            self.log_slow_request(request, view, response, duration,
+                                  recorder)
+        return response
+
+    def log_slow_request(self, request, view, response, duration, recorder):
+        lines = [
+            f'Медленный запрос {request.method} {request.get_full_path()} '
+            f'({view}, {response.status_code}): {duration * 1000:.0f} ms, '
+            f'SQL: {recorder.count} запросов за {recorder.time * 1000:.0f} ms'
+        ]
+        if recorder.slowest_sql is not None:
+            lines.append(f'  самый долгий {recorder.slowest_time * 1000:.1f} '
+                         f'ms: {recorder.slowest_sql}')
+        lines.extend(f'  {query_time * 1000:.1f} ms: {sql}'
+                     for query_time, sql in recorder.statements)
+        logger.warning('\n'.join(lines))
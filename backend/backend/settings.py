@@ -1,6 +1,8 @@
 import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from django.core.management.utils import get_random_secret_key
 from dotenv import load_dotenv
 
@@ -32,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -118,6 +121,100 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'recipes.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Кэш по умолчанию — файловый: он общий для всех воркеров gunicorn на
+# одном хосте. locmem подходит для разработки в одном процессе.
+CACHE_BACKENDS = {
+    'file': 'recipes.cache.FileBasedCache',
+    'locmem': 'recipes.cache.LocMemCache',
+    'redis': 'recipes.cache.RedisCache',
+    'memcached': 'recipes.cache.PyMemcacheCache',
+}
+CACHE_DEFAULT_LOCATIONS = {
+    'file': os.path.join(tempfile.gettempdir(), 'foodgram_cache'),
+    'locmem': '',
+    'redis': 'redis://127.0.0.1:6379/1',
+    'memcached': '127.0.0.1:11211',
+}
+# Число записей в каждом кэше (для file и locmem; у Redis и memcached
+# размер и вытеснение настраиваются на сервере).
+CACHE_MAX_ENTRIES = {
+    'default': 10000,
+    'catalog': 1000,
+    'recipe': 10000,
+    'export': 500,
+    'session': 10000,
+}
+# Файловый кэш перечисляет весь каталог при проверке размера, поэтому
+# его записей держим немного.
+CACHE_FILE_MAX_ENTRIES = 500
+# Версии и сессии должны быть общими для воркеров. Данные в остальных
+# кэшах лежат под версиями, поэтому при файловом кэше они по умолчанию
+# хранятся в памяти процесса: устаревшую копию воркер не отдаст.
+CACHE_SHARED_ALIASES = ('default', 'session')
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+CACHE_LOCATION = os.getenv('CACHE_LOCATION',
+                           CACHE_DEFAULT_LOCATIONS.get(CACHE_BACKEND))
+
+
+def get_cache_backend(alias):
+    backend = os.getenv(f'CACHE_{alias.upper()}_BACKEND')
+    if backend is None:
+        backend = CACHE_BACKEND
+        if backend == 'file' and alias not in CACHE_SHARED_ALIASES:
+            backend = 'locmem'
+    if backend not in CACHE_BACKENDS:
+        raise ImproperlyConfigured(
+            f'CACHE_BACKEND должен быть одним из: {", ".join(CACHE_BACKENDS)}')
+    return backend
+
+
+def get_cache_config(alias, max_entries):
+    # CACHE_<ИМЯ>_BACKEND, CACHE_<ИМЯ>_LOCATION и CACHE_<ИМЯ>_MAX_ENTRIES
+    # задают отдельный бэкенд, сервер и размер для одного кэша.
+    backend = get_cache_backend(alias)
+    location = os.getenv(f'CACHE_{alias.upper()}_LOCATION')
+    if location is None:
+        location = (CACHE_LOCATION if backend == CACHE_BACKEND
+                    else CACHE_DEFAULT_LOCATIONS[backend])
+        if backend in ('file', 'locmem'):
+            location = os.path.join(location, alias)
+    config = {
+        'BACKEND': CACHE_BACKENDS[backend],
+        'LOCATION': location,
+        # По префиксу ведутся счётчики попаданий, он совпадает с именем.
+        'KEY_PREFIX': alias,
+    }
+    if backend == 'file':
+        max_entries = CACHE_FILE_MAX_ENTRIES
+    if backend in ('file', 'locmem'):
+        config['OPTIONS'] = {
+            'MAX_ENTRIES': int(os.getenv(f'CACHE_{alias.upper()}_MAX_ENTRIES',
+                                         max_entries)),
+            'CULL_FREQUENCY': int(os.getenv('CACHE_CULL_FREQUENCY', 3)),
+        }
+    if backend == 'file':
+        config['OPTIONS']['CULL_PROBABILITY'] = float(
+            os.getenv('CACHE_CULL_PROBABILITY', 0.02))
+    return config
+
+
+CACHES = {
+    alias: get_cache_config(alias, max_entries)
+    for alias, max_entries in CACHE_MAX_ENTRIES.items()
+}
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'session'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 DJOSER = {
@@ -139,6 +236,14 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 }
+
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 2))
+EXPORT_JOB_TIMEOUT = int(os.getenv('EXPORT_JOB_TIMEOUT', 5 * 60))
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', 100))
+CATALOG_CACHE_MAX_AGE = int(os.getenv('CATALOG_CACHE_MAX_AGE', 60))
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+METRICS_SLOW_REQUEST_MS = int(os.getenv('METRICS_SLOW_REQUEST_MS', 500))
+METRICS_SLOW_SAMPLE_RATE = float(os.getenv('METRICS_SLOW_SAMPLE_RATE', 0.1))
@@ -38,6 +38,8 @@ class RecipeAdmin(admin.ModelAdmin):
         'text',
         'image',
         'cooking_time',
+        'favorites_count',
+        'shopping_carts_count',
     )
     list_editable = ('author',)
     search_fields = (
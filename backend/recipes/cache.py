@@ -0,0 +1,144 @@
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends import (
+    filebased, locmem, memcached, redis
+)
+
+STATS_CACHE = 'default'
+# Счётчики копятся в памяти процесса и раз в интервал сбрасываются
+# в общий кэш, чтобы эндпоинт видел сумму по всем воркерам.
+STATS_FLUSH_INTERVAL = 10
+
+_missing = object()
+_local = threading.local()
+_lock = threading.Lock()
+_pending = Counter()
+_flushed_at = time.monotonic()
+
+
+@contextmanager
+def stats_muted():
+    # get_many базового класса вызывает get: такие обращения не считаем.
+    muted = getattr(_local, 'muted', False)
+    _local.muted = True
+    try:
+        yield
+    finally:
+        _local.muted = muted
+
+
+def get_stats_key(name, kind):
+    return f'cache_stats:{name}:{kind}'
+
+
+def record(name, hits, misses):
+    with _lock:
+        _pending[name, 'hits'] += hits
+        _pending[name, 'misses'] += misses
+        if time.monotonic() - _flushed_at < STATS_FLUSH_INTERVAL:
+            return
+    flush_stats()
+
+
+def flush_stats():
+    global _flushed_at
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _flushed_at = time.monotonic()
+    cache = caches[STATS_CACHE]
+    with stats_muted():
+        for (name, kind), count in pending.items():
+            if not count:
+                continue
+            key = get_stats_key(name, kind)
+            cache.add(key, 0, timeout=None)
+            try:
+                # В файловом кэше incr не атомарен: счётчики приблизительные.
+                cache.incr(key, count)
+            except ValueError:
+                cache.set(key, count, timeout=None)
+
+
+def get_stats():
+    flush_stats()
+    keys = [
+        get_stats_key(alias, kind)
+        for alias in settings.CACHES for kind in ('hits', 'misses')
+    ]
+    with stats_muted():
+        values = caches[STATS_CACHE].get_many(keys)
+    stats = {}
+    for alias, config in settings.CACHES.items():
+        hits = values.get(get_stats_key(alias, 'hits'), 0)
+        misses = values.get(get_stats_key(alias, 'misses'), 0)
+        stats[alias] = {
+            'backend': config['BACKEND'],
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': (round(hits / (hits + misses), 4)
+                         if hits + misses else None),
+        }
+    return stats
+
+
+def reset_stats():
+    with _lock:
+        _pending.clear()
+    caches[STATS_CACHE].delete_many([
+        get_stats_key(alias, kind)
+        for alias in settings.CACHES for kind in ('hits', 'misses')
+    ])
+
+
+class CacheStatsMixin:
+    # Считает попадания и промахи get/get_many. Счётчики ведутся по
+    # KEY_PREFIX, поэтому в settings он совпадает с именем кэша.
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        if not getattr(_local, 'muted', False):
+            hit = value is not _missing
+            record(self.key_prefix, int(hit), int(not hit))
+        return default if value is _missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with stats_muted():
+            values = super().get_many(keys, version)
+        if not getattr(_local, 'muted', False):
+            record(self.key_prefix, len(values), len(keys) - len(values))
+        return values
+
+
+class LocMemCache(CacheStatsMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(CacheStatsMixin, filebased.FileBasedCache):
+    # Базовый класс перед каждой записью перечисляет все файлы каталога
+    # (_cull), и set дорожает с размером кэша: ~0.5 ms на 100 записей,
+    # 3 ms на 1000, 24 ms на 9000. Размер проверяем лишь у доли записей
+    # (OPTIONS['CULL_PROBABILITY']), между проверками кэш может
+    # ненадолго превысить MAX_ENTRIES.
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get('OPTIONS', {})
+        self._cull_probability = float(options.get('CULL_PROBABILITY', 1))
+
+    def _cull(self):
+        if random.random() < self._cull_probability:
+            super()._cull()
+
+
+class RedisCache(CacheStatsMixin, redis.RedisCache):
+    pass
+
+
+class PyMemcacheCache(CacheStatsMixin, memcached.PyMemcacheCache):
+    pass
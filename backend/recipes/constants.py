@@ -6,6 +6,15 @@ RECIPE_LENGTH = 256
 MAX_INGREDIENTS = 32000
 MAX_COOKING_TIME = 32000
 MAX_PAGE_SIZE = 60
+MAX_RECIPES_LIMIT = 60
 MIN_NUMBER = 1
 SLUG_LENGTH = 32
 TAG_LENGTH = 32
+EXPORT_FORMAT_LENGTH = 8
+EXPORT_STATUS_LENGTH = 16
+RECIPE_IMAGE_MAX_SIZE = (1600, 1600)
+# Карточка в ленте и миниатюра в подписках/избранном/корзине.
+RECIPE_IMAGE_RENDITIONS = {
+    'card': (800, 800),
+    'thumb': (200, 200),
+}
@@ -0,0 +1,300 @@
+import json
+import re
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe, ShoppingList
+from recipes.services.catalog import (
+    INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY
+)
+from recipes.services.recipe_cache import RECIPES_VERSION_KEY
+from recipes.services.shopping_cart_cache import get_cart_version_key
+from recipes.services.synthetic_data import generate_synthetic_data
+from recipes.services.versions import bump_version
+from users.models import Follow
+
+PREFIX = 'benchmark'
+
+# Допустимое число SQL-запросов на запрос к эндпоинту. Не должно зависеть
+# от размера данных: рост числа запросов вместе с --recipes/--users
+# означает N+1.
+QUERY_BUDGETS = {
+    'recipes-list': 7,
+    'recipes-list-anonymous': 5,
+    'recipes-list-cursor': 6,
+    'recipes-list-no-count': 6,
+    'recipes-list-popular': 7,
+    'recipes-list-filtered': 7,
+    'recipes-list-author': 8,
+    'recipes-detail': 6,
+    'tags-list': 2,
+    'ingredients-search': 2,
+    'users-list': 3,
+    'users-me': 2,
+    'users-subscriptions': 4,
+    'download-shopping-cart': 2,
+}
+
+INDEX_SCAN_RE = re.compile(
+    r'(?:Index(?: Only)? Scan(?: Backward)? using|Bitmap Index Scan on) '
+    r'(?:"([^"]+)"|(\S+))')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('benchmark API endpoints on synthetic data: query count, '
+            'wall time and response size')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--recipes', type=int, default=200)
+        parser.add_argument('--ingredients', type=int, default=300)
+        parser.add_argument('--follows', type=int, default=5)
+        parser.add_argument('--favorites', type=int, default=10)
+        parser.add_argument('--carts', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--budget', action='append', default=[],
+                            metavar='ENDPOINT=QUERIES',
+                            help='override query budget of an endpoint')
+        parser.add_argument('--output', type=str,
+                            help='append results as a JSON line to file')
+        parser.add_argument('--keep', action='store_true',
+                            help='keep synthetic data in the database')
+        parser.add_argument('--skip-explain', action='store_true',
+                            help='do not check query plans for index usage')
+
+    def handle(self, *args, **options):
+        budgets = dict(QUERY_BUDGETS)
+        for item in options['budget']:
+            name, _, value = item.partition('=')
+            if name not in budgets or not value.isdigit():
+                raise CommandError(f'Неверный бюджет: {item}')
+            budgets[name] = int(value)
+
+        plans = {}
+        try:
+            with override_settings(CACHES=self.get_caches()), \
+                    transaction.atomic():
+                data = generate_synthetic_data(
+                    users=options['users'], recipes=options['recipes'],
+                    ingredients=options['ingredients'],
+                    follows=options['follows'],
+                    favorites=options['favorites'], carts=options['carts'],
+                    seed=options['seed'], prefix=PREFIX)
+                self.bump_versions(data)
+                results = self.run_benchmark(data, options)
+                if (connection.vendor == 'postgresql'
+                        and not options['skip_explain']):
+                    plans = self.check_indexes(data)
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            pass
+
+        self.report(results, budgets)
+        self.report_plans(plans)
+        if options['output']:
+            with open(options['output'], 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'commit': self.get_commit(),
+                    'options': {key: options[key] for key in (
+                        'users', 'recipes', 'ingredients', 'follows',
+                        'favorites', 'carts', 'seed', 'repeat')},
+                    'results': results,
+                    'plans': plans,
+                }, ensure_ascii=False) + '\n')
+
+        exceeded = [
+            f'{name}: {result["queries"]} > {budgets[name]}'
+            for name, result in results.items()
+            if result['queries'] > budgets[name]
+        ]
+        if exceeded:
+            raise CommandError(
+                'Превышен бюджет запросов: ' + ', '.join(exceeded))
+        unindexed = [name for name, plan in plans.items()
+                     if plan['seq_scans']]
+        if unindexed:
+            raise CommandError(
+                'Запросы без индекса: ' + ', '.join(unindexed))
+
+    def get_caches(self):
+        # Свой префикс ключей: прогрев и сброс версий не задевают рабочий
+        # кэш, если бенчмарк запущен на живой базе.
+        return {
+            alias: {
+                **config,
+                'KEY_PREFIX': f'{PREFIX}-{config.get("KEY_PREFIX", alias)}',
+            }
+            for alias, config in settings.CACHES.items()
+        }
+
+    def bump_versions(self, data):
+        # Кэш бенчмарка общий между запусками, а данные откатываются вместе
+        # с on_commit-сбросами версий (и в SQLite id переиспользуются).
+        for key in (TAGS_VERSION_KEY, INGREDIENTS_VERSION_KEY,
+                    RECIPES_VERSION_KEY):
+            bump_version(key)
+        for user in data['users']:
+            bump_version(get_cart_version_key(user.id))
+
+    def run_benchmark(self, data, options):
+        viewer = data['users'][0]
+        recipe = data['recipes'][0]
+        tags = '&'.join(f'tags={tag.slug}' for tag in data['tags'][:2])
+
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=viewer)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        anonymous = APIClient()
+
+        endpoints = (
+            ('recipes-list', client, '/api/recipes/?limit=60'),
+            ('recipes-list-anonymous', anonymous, '/api/recipes/?limit=60'),
+            ('recipes-list-cursor', client,
+             '/api/recipes/?limit=60&pagination=cursor'),
+            ('recipes-list-no-count', client,
+             '/api/recipes/?limit=60&page=2&count=false'),
+            ('recipes-list-popular', client,
+             '/api/recipes/?limit=60&ordering=popular'),
+            ('recipes-list-filtered', client,
+             f'/api/recipes/?limit=60&{tags}&is_favorited=1'),
+            ('recipes-list-author', client,
+             f'/api/recipes/?limit=60&author={recipe.author_id}'),
+            ('recipes-detail', client, f'/api/recipes/{recipe.id}/'),
+            ('tags-list', client, '/api/tags/'),
+            ('ingredients-search', client, f'/api/ingredients/?name={PREFIX}'),
+            ('users-list', client, '/api/users/?limit=60'),
+            ('users-me', client, '/api/users/me/'),
+            ('users-subscriptions', client,
+             '/api/users/subscriptions/?recipes_limit=3'),
+            ('download-shopping-cart', client,
+             '/api/recipes/download_shopping_cart/'),
+        )
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            return {
+                name: self.measure(client, url, options['repeat'])
+                for name, client, url in endpoints
+            }
+
+    def measure(self, client, url, repeat):
+        # Бюджет проверяется по худшему повтору: первый запрос идёт
+        # с холодным кэшем, и N+1 на этом пути не должен теряться.
+        timings = []
+        query_counts = []
+        for _ in range(max(repeat, 1)):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    content = b''.join(response.streaming_content)
+                else:
+                    content = response.content
+                timings.append(time.perf_counter() - start)
+            query_counts.append(len(queries))
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{url} вернул {response.status_code}: {content[:200]}')
+        return {
+            'url': url,
+            'queries': max(query_counts),
+            'warm_queries': query_counts[-1],
+            'median_ms': round(statistics.median(timings) * 1000, 2),
+            'min_ms': round(min(timings) * 1000, 2),
+            'bytes': len(content),
+        }
+
+    def get_index_checks(self, data):
+        # Запросы повторяют пути фильтров AuthorAndTagFilter и подписок;
+        # для каждого указаны таблицы, которые нельзя читать целиком.
+        viewer = data['users'][0]
+        author = data['recipes'][0].author_id
+        tag = data['tags'][0]
+        recipes = Recipe.objects.order_by('-pub_date', '-id')
+        return {
+            'recipes-by-date': (recipes[:6], Recipe),
+            'recipes-by-author': (recipes.filter(author=author)[:6], Recipe),
+            'recipes-by-tag': (
+                recipes.filter(tags__slug=tag.slug)[:6], Recipe.tags.through),
+            'recipes-popular': (
+                Recipe.objects.order_by('-favorites_count', '-pub_date')[:6],
+                Recipe),
+            'recipes-favorited': (
+                recipes.filter(favorites__user=viewer)[:6], Favorite),
+            'recipes-in-shopping-cart': (
+                recipes.filter(shoppinglist_recipes__user=viewer)[:6],
+                ShoppingList),
+            'favorites-by-user': (
+                Favorite.objects.filter(user=viewer).order_by('-id'),
+                Favorite),
+            'is-favorited': (
+                Favorite.objects.filter(
+                    user=viewer, recipe=data['recipes'][0]), Favorite),
+            'subscriptions': (
+                Follow.objects.filter(subscriber=viewer), Follow),
+            'is-subscribed': (
+                Follow.objects.filter(subscriber=viewer, user=author), Follow),
+        }
+
+    def check_indexes(self, data):
+        # На синтетических данных таблицы малы, и планировщик выбирает
+        # последовательное чтение. Запрещаем его, чтобы проверить, что
+        # подходящий индекс вообще есть.
+        plans = {}
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                for name, (queryset, model) in self.get_index_checks(
+                        data).items():
+                    plan = queryset.explain()
+                    table = model._meta.db_table
+                    plans[name] = {
+                        'indexes': [quoted or name for quoted, name
+                                    in INDEX_SCAN_RE.findall(plan)],
+                        'seq_scans': [table] if re.search(
+                            rf'Seq Scan on "?{table}"?\b', plan) else [],
+                    }
+            finally:
+                cursor.execute('RESET enable_seqscan')
+        return plans
+
+    def report(self, results, budgets):
+        self.stdout.write(
+            f'{"endpoint":<26}{"queries":>8}{"warm":>6}{"budget":>8}'
+            f'{"median ms":>11}{"min ms":>9}{"bytes":>10}')
+        for name, result in results.items():
+            line = (f'{name:<26}{result["queries"]:>8}'
+                    f'{result["warm_queries"]:>6}{budgets[name]:>8}'
+                    f'{result["median_ms"]:>11}{result["min_ms"]:>9}'
+                    f'{result["bytes"]:>10}')
+            if result['queries'] > budgets[name]:
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+    def report_plans(self, plans):
+        for name, plan in plans.items():
+            line = f'{name:<26}{", ".join(plan["indexes"]) or "-"}'
+            if plan['seq_scans']:
+                line = self.style.ERROR(
+                    f'{line} (seq scan: {", ".join(plan["seq_scans"])})')
+            self.stdout.write(line)
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True,
+                text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
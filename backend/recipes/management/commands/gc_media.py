@@ -0,0 +1,41 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.storage import get_referenced_names
+
+MIN_AGE_HOURS = 24
+
+
+class Command(BaseCommand):
+    help = 'delete media files that no database record refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=float, default=MIN_AGE_HOURS,
+                            help='keep files younger than this many hours')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        # Свежие файлы не трогаем: запись о них может быть ещё
+        # не закоммичена, а их URL — уже отдан клиенту.
+        referenced = get_referenced_names()
+        deadline = time.time() - options['min_age'] * 60 * 60
+        deleted = kept = freed = 0
+        for root, _, files in os.walk(settings.MEDIA_ROOT):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, settings.MEDIA_ROOT).replace(
+                    os.sep, '/')
+                stat = os.stat(path)
+                if name in referenced or stat.st_mtime > deadline:
+                    kept += 1
+                    continue
+                if not options['dry_run']:
+                    os.remove(path)
+                deleted += 1
+                freed += stat.st_size
+        self.stdout.write(
+            f'Удалено: {deleted} ({freed // 1024} КБ), оставлено: {kept}'
+            + (' (пробный запуск)' if options['dry_run'] else ''))
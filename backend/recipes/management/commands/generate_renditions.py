@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from recipes.constants import RECIPE_IMAGE_RENDITIONS
+from recipes.models import Recipe
+from recipes.services.images import save_renditions
+
+
+class Command(BaseCommand):
+    help = 'generate missing recipe image renditions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='regenerate renditions of every recipe')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='').exclude(image=None)
+        if not options['all']:
+            recipes = recipes.filter(image_renditions={})
+        done = failed = 0
+        for recipe in recipes.only('id', 'image').iterator():
+            try:
+                save_renditions(recipe, RECIPE_IMAGE_RENDITIONS)
+                done += 1
+            except OSError as error:
+                failed += 1
+                self.stderr.write(f'{recipe.image.name}: {error}')
+        self.stdout.write(f'Готово: {done}, ошибок: {failed}')
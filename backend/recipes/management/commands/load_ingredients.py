@@ -1,36 +1,52 @@
-import json
+import csv
 import os
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from django.db.utils import IntegrityError
 
-from recipes.models import Ingredient
+from recipes.services.catalog import bump_ingredients_version
+from recipes.services.ingredient_loader import (
+    BATCH_SIZE, FORMATS, get_format, load_ingredients, read_ingredients
+)
 
 DATA_ROOT = os.path.join(settings.BASE_DIR, 'data')
 
 
 class Command(BaseCommand):
-    help = 'loading ingredients from data in json'
+    help = 'loading ingredients from data in json, ndjson or csv'
 
     def add_arguments(self, parser):
         parser.add_argument('filename', default='ingredients.json', nargs='?',
                             type=str)
+        parser.add_argument('--format', choices=FORMATS,
+                            help='file format, by default from extension')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--no-update', action='store_true',
+                            help='keep measurement units of existing '
+                                 'ingredients')
 
     def handle(self, *args, **options):
+        path = os.path.join(DATA_ROOT, options['filename'])
+        data_format = options['format'] or get_format(path)
+        if data_format not in FORMATS:
+            raise CommandError(f'Неизвестный формат файла: {data_format}')
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше 0')
+        stats = {}
         try:
-            with open(os.path.join(DATA_ROOT, options['filename']), 'r',
-                      encoding='utf-8') as f:
-                data = json.load(f)
-                for ingredient in data:
-                    try:
-                        Ingredient.objects.create(name=ingredient["name"],
-                                                  measurement_unit=ingredient[
-                                                      "measurement_unit"])
-                    except IntegrityError:
-                        print(f'Ингридиет {ingredient["name"]} '
-                              f'{ingredient["measurement_unit"]} '
-                              f'уже есть в базе')
-
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                stats = load_ingredients(
+                    read_ingredients(f, data_format),
+                    batch_size=options['batch_size'],
+                    update=not options['no_update'])
         except FileNotFoundError:
             raise CommandError('Файл отсутствует в директории data')
+        except (ValueError, csv.Error) as error:
+            raise CommandError(f'Ошибка в файле: {error}')
+        finally:
+            # Пачки коммитятся по отдельности, поэтому кэш сбрасывается
+            # и после частичной загрузки.
+            bump_ingredients_version()
+        self.stdout.write(
+            f'Добавлено: {stats["inserted"]}, обновлено: {stats["updated"]}, '
+            f'пропущено: {stats["skipped"]}')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import Favorite, Recipe, ShoppingList
+from recipes.services.counters import recount_counters
+from users.models import Follow, User
+
+
+class Command(BaseCommand):
+    help = 'recount denormalized favorite, cart, recipe and follower counters'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            recount_counters(Recipe, User, Favorite, ShoppingList, Follow)
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны'))
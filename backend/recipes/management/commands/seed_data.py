@@ -0,0 +1,84 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+
+from recipes.services.fixture_import import BATCH_SIZE, import_fixture
+from recipes.services.synthetic_data import generate_synthetic_data
+
+DATA_ROOT = os.path.join(settings.BASE_DIR, 'data')
+
+
+class Command(BaseCommand):
+    help = ('fast import of a json fixture (legacy api.* labels included) '
+            'or generation of synthetic data')
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', default='init_data.json', nargs='?',
+                            type=str)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--copy', action='store_true',
+                            help='insert with COPY (PostgreSQL only)')
+        parser.add_argument('--ignore-conflicts', action='store_true',
+                            help='skip rows that already exist')
+        parser.add_argument('--synthetic', action='store_true',
+                            help='generate synthetic data instead of '
+                                 'importing a fixture')
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--recipes', type=int, default=200)
+        parser.add_argument('--ingredients', type=int, default=300)
+        parser.add_argument('--follows', type=int, default=5)
+        parser.add_argument('--favorites', type=int, default=10)
+        parser.add_argument('--carts', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', type=str, default='synthetic')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше 0')
+        if options['synthetic']:
+            self.generate(options)
+        else:
+            self.load(options)
+
+    def generate(self, options):
+        with transaction.atomic():
+            data = generate_synthetic_data(
+                users=options['users'], recipes=options['recipes'],
+                ingredients=options['ingredients'],
+                follows=options['follows'], favorites=options['favorites'],
+                carts=options['carts'], seed=options['seed'],
+                prefix=options['prefix'])
+        self.stdout.write(', '.join(
+            f'{name}: {len(objs)}' for name, objs in data.items()))
+
+    def load(self, options):
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('COPY доступен только для PostgreSQL')
+        if options['copy'] and options['ignore_conflicts']:
+            raise CommandError(
+                '--copy нельзя использовать с --ignore-conflicts')
+        try:
+            with open(os.path.join(DATA_ROOT, options['filename']), 'r',
+                      encoding='utf-8') as f:
+                loaded, skipped, duplicates = import_fixture(
+                    f, batch_size=options['batch_size'],
+                    use_copy=options['copy'],
+                    ignore_conflicts=options['ignore_conflicts'])
+        except FileNotFoundError:
+            raise CommandError('Файл отсутствует в директории data')
+        except ValueError as error:
+            raise CommandError(f'Ошибка в файле: {error}')
+        except IntegrityError as error:
+            raise CommandError(
+                f'Данные конфликтуют с базой ({error}), '
+                f'попробуйте --ignore-conflicts')
+        for label, count in loaded.items():
+            self.stdout.write(f'{label}: {count}')
+        if duplicates:
+            self.stdout.write('Повторы в файле пропущены: ' + ', '.join(
+                f'{label} ({count})' for label, count in duplicates.items()))
+        if skipped:
+            self.stdout.write('Пропущено: ' + ', '.join(
+                f'{label} ({count})' for label, count in skipped.items()))
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+INDEX_NAME = 'recipes_ingredient_name_upper_like'
+
+
+def create_index(apps, schema_editor):
+    # istartswith на PostgreSQL превращается в UPPER(name::text) LIKE ...,
+    # обычный индекс по name для него не подходит.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON recipes_ingredient '
+            f'(UPPER(name::text) text_pattern_ops)'
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_shoppingcartexport'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
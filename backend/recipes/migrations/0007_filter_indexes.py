@@ -0,0 +1,48 @@
+# Generated by Django 4.2.13 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+TAG_INDEX_NAME = 'recipe_tags_tag_recipe_idx'
+
+
+def get_tags_index(apps):
+    through = apps.get_model('recipes', 'Recipe').tags.through
+    return through, models.Index(fields=['tag', 'recipe'],
+                                 name=TAG_INDEX_NAME)
+
+
+def create_tags_index(apps, schema_editor):
+    # Уникальное ограничение автоматической m2m-таблицы идёт по
+    # (recipe, tag), а фильтр по тэгам ищет рецепты от тэга.
+    schema_editor.add_index(*get_tags_index(apps))
+
+
+def drop_tags_index(apps, schema_editor):
+    schema_editor.remove_index(*get_tags_index(apps))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['user', '-id'], name='favorite_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date', '-id'], name='recipe_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppinglist',
+            index=models.Index(fields=['user', '-id'], name='shoppinglist_user_id_idx'),
+        ),
+        migrations.RunPython(create_tags_index, drop_tags_index),
+    ]
@@ -1,13 +1,17 @@
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models import UniqueConstraint
 
 from recipes.constants import (
-    INGREDIENT_LENGTH, MAX_COOKING_TIME, MAX_INGREDIENTS,
-    MEASURMENT_LENGTH, MIN_COOKING_TIME, MIN_INGREDIENTS,
-    RECIPE_LENGTH, SLUG_LENGTH, TAG_LENGTH
+    EXPORT_FORMAT_LENGTH, EXPORT_STATUS_LENGTH, INGREDIENT_LENGTH,
+    MAX_COOKING_TIME, MAX_INGREDIENTS, MEASURMENT_LENGTH,
+    MIN_COOKING_TIME, MIN_INGREDIENTS, RECIPE_IMAGE_RENDITIONS, RECIPE_LENGTH,
+    SLUG_LENGTH, TAG_LENGTH
 )
+from recipes.services.counters import CountersMixin
 
 
 User = get_user_model()
@@ -54,7 +58,13 @@ class Tag(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class Recipe(CountersMixin, models.Model):
+    counter_fields = ('favorites_count', 'shopping_carts_count')
+    file_reference_lookups = tuple(
+        f'image_renditions__{rendition}'
+        for rendition in RECIPE_IMAGE_RENDITIONS
+    )
+
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -74,6 +84,12 @@ class Recipe(models.Model):
         null=True,
         blank=True
     )
+    image_renditions = models.JSONField(
+        verbose_name='Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+        editable=False
+    )
     cooking_time = models.PositiveSmallIntegerField(
         verbose_name='Время приготовления',
         validators=[MinValueValidator(MIN_COOKING_TIME,
@@ -95,12 +111,30 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False
+    )
+    shopping_carts_count = models.PositiveIntegerField(
+        verbose_name='В корзинах',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         default_related_name = 'recipes'
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='recipe_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='recipe_author_pub_date_idx'),
+            models.Index(fields=['-favorites_count', '-pub_date'],
+                         name='recipe_popular_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -161,6 +195,10 @@ class Favorite(models.Model):
             models.UniqueConstraint(fields=['user', 'recipe'],
                                     name='unique favorite recipe for user')
         ]
+        # Индекс (user, recipe) уже создаётся уникальным ограничением.
+        indexes = [
+            models.Index(fields=['user', '-id'], name='favorite_user_id_idx'),
+        ]
 
 
 class ShoppingList(models.Model):
@@ -185,6 +223,60 @@ class ShoppingList(models.Model):
             UniqueConstraint(fields=['user', 'recipe'],
                              name='unique_shopping_cart')
         ]
+        indexes = [
+            models.Index(fields=['user', '-id'],
+                         name='shoppinglist_user_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user} добавил рецепт "{self.recipe}" в Корзину'
+
+
+class ShoppingCartExport(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Готово'
+        FAILED = 'failed', 'Ошибка'
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_exports',
+        verbose_name='Пользователь',
+    )
+    format = models.CharField(
+        verbose_name='Формат',
+        max_length=EXPORT_FORMAT_LENGTH
+    )
+    cart_version = models.BigIntegerField(
+        verbose_name='Версия корзины'
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=EXPORT_STATUS_LENGTH,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    file = models.FileField(
+        verbose_name='Файл',
+        upload_to='shopping_carts/',
+        blank=True
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Выгрузка корзины'
+        verbose_name_plural = 'Выгрузки корзины'
+
+    def __str__(self):
+        return f'{self.user}: {self.format} ({self.status})'
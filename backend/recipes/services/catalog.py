@@ -0,0 +1,28 @@
+from django.core.cache import caches
+
+from recipes.models import Tag
+from recipes.services.versions import bump_version_on_commit, get_version
+
+INGREDIENTS_VERSION_KEY = 'ingredients_version'
+TAGS_VERSION_KEY = 'tags_version'
+TAG_IDS_TIMEOUT = 60 * 60 * 24
+CATALOG_CACHE = 'catalog'
+
+
+def bump_ingredients_version():
+    bump_version_on_commit(INGREDIENTS_VERSION_KEY)
+
+
+def bump_tags_version():
+    bump_version_on_commit(TAGS_VERSION_KEY)
+
+
+def get_tag_ids(slugs):
+    # Словарь slug -> id кэшируется до следующего изменения тэгов.
+    key = f'tag_ids:{get_version(TAGS_VERSION_KEY)}'
+    cache = caches[CATALOG_CACHE]
+    tag_ids = cache.get(key)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(key, tag_ids, TAG_IDS_TIMEOUT)
+    return [tag_ids[slug] for slug in slugs if slug in tag_ids]
@@ -0,0 +1,46 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+class CountersMixin:
+    # Счётчики меняются только через F()-обновления: обычный save() не
+    # должен затирать их значениями из памяти.
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+def increment(queryset, field, delta):
+    if delta < 0:
+        # Не уходим в минус, если счётчик ещё не пересчитан после
+        # загрузки данных в обход сигналов.
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field).annotate(count=Count('pk')).values('count'),
+        output_field=IntegerField()
+    ), 0)
+
+
+def recount_counters(recipe_model, user_model, favorite_model,
+                     shopping_list_model, follow_model):
+    # Пересчёт после загрузки данных в обход сигналов (bulk_create, COPY).
+    recipe_model.objects.update(
+        favorites_count=count_subquery(favorite_model, 'recipe'),
+        shopping_carts_count=count_subquery(shopping_list_model, 'recipe'),
+    )
+    user_model.objects.update(
+        recipes_count=count_subquery(recipe_model, 'author'),
+        followers_count=count_subquery(follow_model, 'user'),
+    )
@@ -0,0 +1,201 @@
+import graphlib
+import io
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from recipes.models import Favorite, Recipe, ShoppingList
+from recipes.services.catalog import (
+    bump_ingredients_version, bump_tags_version
+)
+from recipes.services.counters import recount_counters
+from recipes.services.ingredient_loader import iter_json_array
+from recipes.services.recipe_cache import bump_recipes_version
+from users.models import Follow
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+# Старые фикстуры написаны для приложения api и стандартного auth.User.
+LEGACY_LABELS = {
+    'api.ingredient': 'recipes.ingredient',
+    'api.tag': 'recipes.tag',
+    'api.recipe': 'recipes.recipe',
+    'api.ingredientamount': 'recipes.ingredientinrecipe',
+    'api.favorite': 'recipes.favorite',
+    'api.cart': 'recipes.shoppinglist',
+    'auth.user': 'users.user',
+}
+# Служебные таблицы зависят от конкретной базы и не переносятся.
+SKIPPED_LABELS = {
+    'admin.logentry',
+    'auth.permission',
+    'contenttypes.contenttype',
+    'sessions.session',
+}
+
+
+def get_model(label):
+    label = LEGACY_LABELS.get(label.lower(), label.lower())
+    if label in SKIPPED_LABELS:
+        return None
+    try:
+        return apps.get_model(label)
+    except (LookupError, ValueError):
+        return None
+
+
+def build_objects(model, item, rows):
+    fields = item.get('fields', {})
+    obj = model(pk=item.get('pk'))
+    for field in model._meta.concrete_fields:
+        if field.name in fields:
+            value = fields[field.name]
+            setattr(obj, field.attname,
+                    value if field.is_relation else field.to_python(value))
+    rows[model].append(obj)
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        if field.name not in fields or not through._meta.auto_created:
+            continue
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+        rows[through].extend(
+            through(**{source: obj.pk, target: pk})
+            for pk in fields[field.name]
+        )
+
+
+def sort_models(models):
+    # Модель вставляется после всех моделей, на которые ссылаются её FK.
+    graph = {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+    return list(graphlib.TopologicalSorter(graph).static_order())
+
+
+def get_unique_fields(model):
+    # Наборы полей (attname), значения которых не могут повторяться.
+    field_sets = [(field.attname,) for field in model._meta.concrete_fields
+                  if field.unique]
+    for names in (*model._meta.unique_together,
+                  *(constraint.fields for constraint
+                    in model._meta.total_unique_constraints)):
+        field_sets.append(tuple(
+            model._meta.get_field(name).attname for name in names))
+    return field_sets
+
+
+def deduplicate(model, objs, replaced):
+    # Ссылки на выброшенные дубликаты переводятся на оставшуюся запись,
+    # поэтому родительские модели обрабатываются раньше (sort_models).
+    relations = [
+        field for field in model._meta.concrete_fields
+        if field.is_relation and field.related_model in replaced
+    ]
+    unique_fields = get_unique_fields(model)
+    seen = [{} for _ in unique_fields]
+    kept = []
+    for obj in objs:
+        for field in relations:
+            value = getattr(obj, field.attname)
+            setattr(obj, field.attname,
+                    replaced[field.related_model].get(value, value))
+        for fields, values in zip(unique_fields, seen):
+            key = tuple(getattr(obj, name) for name in fields)
+            # NULL в уникальных полях не конфликтует.
+            if None in key:
+                continue
+            original = values.get(key)
+            if original is not None:
+                if obj.pk is not None and original.pk is not None:
+                    replaced[model][obj.pk] = original.pk
+                break
+        else:
+            for fields, values in zip(unique_fields, seen):
+                values[tuple(getattr(obj, name) for name in fields)] = obj
+            kept.append(obj)
+    return kept
+
+
+def copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def copy_objects(model, objs, batch_size):
+    fields = [field for field in model._meta.concrete_fields
+              if not field.primary_key or objs[0].pk is not None]
+    quote = connection.ops.quote_name
+    sql = (f'COPY {quote(model._meta.db_table)} '
+           f'({", ".join(quote(field.column) for field in fields)}) '
+           f'FROM STDIN')
+    with connection.cursor() as cursor:
+        for start in range(0, len(objs), batch_size):
+            buffer = io.StringIO()
+            for obj in objs[start:start + batch_size]:
+                buffer.write('\t'.join(
+                    copy_value(field.get_db_prep_save(
+                        field.pre_save(obj, True), connection))
+                    for field in fields
+                ) + '\n')
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+
+
+def reset_sequences(models):
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def import_fixture(file, batch_size=BATCH_SIZE, use_copy=False,
+                   ignore_conflicts=False):
+    rows = defaultdict(list)
+    skipped = Counter()
+    for item in iter_json_array(file):
+        model = get_model(item['model'])
+        if model is None:
+            skipped[item['model']] += 1
+        else:
+            build_objects(model, item, rows)
+
+    models = sort_models({model for model, objs in rows.items() if objs})
+    # Повторы по уникальным полям внутри фикстуры (например, одинаковые
+    # названия ингредиентов) пропускаются: остаётся первая запись.
+    duplicates = Counter()
+    replaced = defaultdict(dict)
+    for model in models:
+        objs = deduplicate(model, rows[model], replaced)
+        if len(objs) < len(rows[model]):
+            duplicates[model._meta.label_lower] = len(rows[model]) - len(objs)
+            rows[model] = objs
+    with transaction.atomic():
+        for model in models:
+            if use_copy:
+                copy_objects(model, rows[model], batch_size)
+            else:
+                model.objects.bulk_create(
+                    rows[model], batch_size=batch_size,
+                    ignore_conflicts=ignore_conflicts)
+        reset_sequences(models)
+        # bulk_create и COPY не отправляют сигналы.
+        recount_counters(Recipe, User, Favorite, ShoppingList, Follow)
+        bump_ingredients_version()
+        bump_tags_version()
+        bump_recipes_version()
+    return ({model._meta.label_lower: len(rows[model]) for model in models},
+            dict(skipped), dict(duplicates))
@@ -1,47 +1,77 @@
-from reportlab.pdfgen import canvas
+import functools
+import tempfile
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.http import FileResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
-from django.http import HttpResponse
+from reportlab.pdfgen import canvas
+
 from recipes.models import IngredientInRecipe
 
+FONT_NAME = 'Slimamif'
+FONT_PATH = settings.BASE_DIR / 'Slimamif.ttf'
+TITLE_SIZE = 24
+LINE_SIZE = 16
+LINE_HEIGHT = 25
+MARGIN_LEFT = 75
+MARGIN_TOP = 50
+MARGIN_BOTTOM = 50
+# Файл держится в памяти до этого размера, дальше уходит на диск.
+SPOOL_MAX_SIZE = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
 
-def generate_shopping_cart_pdf(user):
-    final_list = {}
-    ingredients = IngredientInRecipe.objects.filter(
+
+@functools.lru_cache(maxsize=None)
+def register_font():
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH, 'UTF-8'))
+
+
+def get_shopping_cart_ingredients(user):
+    return IngredientInRecipe.objects.filter(
         recipe__shoppinglist_recipes__user=user
-    ).values_list(
-        'ingredient__name', 'ingredient__measurement_unit', 'amount'
-    )
-    for item in ingredients:
-        name = item[0]
-        if name not in final_list:
-            final_list[name] = {
-                'measurement_unit': item[1],
-                'amount': item[2]
-            }
-        else:
-            final_list[name]['amount'] += item[2]
-
-    pdfmetrics.registerFont(
-        TTFont('Slimamif', 'Slimamif.ttf', 'UTF-8')
-    )
-
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = (
-        'attachment; filename="shopping_list.pdf"'
-    )
-    page = canvas.Canvas(response)
-    page.setFont('Slimamif', size=24)
-    page.drawString(200, 800, 'Список ингредиентов')
-    page.setFont('Slimamif', size=16)
-    height = 750
-    for i, (name, data) in enumerate(final_list.items(), 1):
-        page.drawString(
-            75, height,
-            f'<{i}> {name} - {data["amount"]}, {data["measurement_unit"]}'
-        )
-        height -= 25
+    ).values(
+        name=F('ingredient__name'),
+        measurement_unit=F('ingredient__measurement_unit'),
+    ).annotate(
+        total_amount=Sum('amount')
+    ).order_by('name', 'measurement_unit')
+
+
+def write_shopping_cart_pdf(ingredients, file):
+    register_font()
+    width, height = A4
+    max_width = width - 2 * MARGIN_LEFT
+    page = canvas.Canvas(file, pagesize=A4)
+    page.setFont(FONT_NAME, size=TITLE_SIZE)
+    page.drawCentredString(width / 2, height - MARGIN_TOP,
+                           'Список ингредиентов')
+    page.setFont(FONT_NAME, size=LINE_SIZE)
+    y = height - MARGIN_TOP - 2 * LINE_HEIGHT
+    for i, item in enumerate(ingredients, 1):
+        text = (f'<{i}> {item["name"]} - {item["total_amount"]}, '
+                f'{item["measurement_unit"]}')
+        for line in simpleSplit(text, FONT_NAME, LINE_SIZE, max_width):
+            if y < MARGIN_BOTTOM:
+                page.showPage()
+                page.setFont(FONT_NAME, size=LINE_SIZE)
+                y = height - MARGIN_TOP
+            page.drawString(MARGIN_LEFT, y, line)
+            y -= LINE_HEIGHT
     page.showPage()
     page.save()
 
+
+def generate_shopping_cart_pdf(user):
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    write_shopping_cart_pdf(
+        get_shopping_cart_ingredients(user).iterator(), file)
+    file.seek(0)
+    response = FileResponse(file, as_attachment=True,
+                            filename='shopping_list.pdf',
+                            content_type='application/pdf')
+    response.block_size = CHUNK_SIZE
     return response
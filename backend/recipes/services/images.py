@@ -0,0 +1,134 @@
+import io
+import os
+
+from django.apps import apps
+from django.core.files import File
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+from recipes.services.jobs import submit_job
+
+JPEG_QUALITY = 85
+
+# Отправляется после того, как фоновая задача заменила файл в записи:
+# queryset.update() не вызывает post_save.
+image_processed = Signal()
+
+
+def get_format(image):
+    # Прозрачность сохраняем в PNG, всё остальное пережимаем в JPEG.
+    if image.mode in ('RGBA', 'LA', 'PA'):
+        return 'PNG'
+    return 'JPEG'
+
+
+def get_extension(image_format):
+    return 'png' if image_format == 'PNG' else 'jpg'
+
+
+def encode_image(image, image_format, name):
+    # Метаданные (EXIF, ICC, текстовые блоки PNG) не передаются в save
+    # и в файл не попадают.
+    buffer = io.BytesIO()
+    if image_format == 'PNG':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.convert('RGB').save(buffer, 'JPEG', quality=JPEG_QUALITY,
+                                  optimize=True, progressive=True)
+    buffer.seek(0)
+    return File(buffer, name=name)
+
+
+def open_image(file, max_size):
+    image = Image.open(file)
+    # JPEG можно декодировать сразу в уменьшенном масштабе.
+    image.draft('RGB', max_size)
+    image = ImageOps.exif_transpose(image)
+    if image.mode == 'P':
+        # Палитру уменьшать нельзя без потерь: переводим в полноцветный.
+        image = image.convert(
+            'RGBA' if 'transparency' in image.info else 'RGB')
+    image.thumbnail(max_size, Image.LANCZOS)
+    return image
+
+
+def get_upload_name(field, name, extension=None):
+    # Новые файлы кладём в upload_to поля, а не рядом с исходным:
+    # хранилище по содержимому само раскладывает их по подкаталогам.
+    root, original_extension = os.path.splitext(os.path.basename(name))
+    return field.generate_filename(
+        None, f'{root}{extension or original_extension}')
+
+
+def rendition_name(name, rendition):
+    root, extension = os.path.splitext(name)
+    return f'{root}_{rendition}{extension}'
+
+
+def generate_renditions(storage, name, image, renditions):
+    image_format = get_format(image)
+    names = {}
+    for rendition, size in renditions.items():
+        copy = image.copy()
+        copy.thumbnail(size, Image.LANCZOS)
+        path = rendition_name(name, rendition)
+        names[rendition] = storage.save(
+            path, encode_image(copy, image_format, path))
+    return names
+
+
+def save_renditions(instance, renditions, image_field='image',
+                    renditions_field='image_renditions'):
+    image = getattr(instance, image_field)
+    with image.open('rb'):
+        picture = Image.open(image)
+        picture.load()
+    names = generate_renditions(
+        image.storage, get_upload_name(image.field, image.name), picture,
+        renditions)
+    # Если картинку успели заменить, копии старой не записываются.
+    if type(instance).objects.filter(
+            pk=instance.pk, **{image_field: image.name}
+    ).update(**{renditions_field: names}):
+        image_processed.send(sender=type(instance), pk=instance.pk)
+    setattr(instance, renditions_field, names)
+    return names
+
+
+def process_image(label, pk, image_field, name, max_size, renditions=None,
+                  renditions_field='image_renditions'):
+    # Пережимает загруженный как есть файл и строит уменьшенные копии.
+    # Исходный файл с метаданными (EXIF, GPS) после этого удаляется.
+    model = apps.get_model(label)
+    field = model._meta.get_field(image_field)
+    storage = field.storage
+    uploaded = os.path.getmtime(storage.path(name))
+    with storage.open(name, 'rb') as file:
+        image = open_image(file, max_size)
+    image_format = get_format(image)
+    upload_name = get_upload_name(
+        field, name, f'.{get_extension(image_format)}')
+    path = storage.save(
+        upload_name, encode_image(image, image_format, upload_name))
+    values = {image_field: path}
+    if renditions:
+        values[renditions_field] = generate_renditions(
+            storage, upload_name, image, renditions)
+    if model.objects.filter(pk=pk, **{image_field: name}).update(**values):
+        image_processed.send(sender=model, pk=pk)
+    else:
+        # Пока шла обработка, загрузили другую картинку.
+        for created in (path, *values.get(renditions_field, {}).values()):
+            storage.delete(created)
+    # Исходник удаляется сразу, без ожидания gc_media, если на него не
+    # ссылаются (пережатый файл мог совпасть с ним) и его не получила
+    # другая загрузка за время обработки.
+    storage.delete_unreferenced(name, modified_before=uploaded)
+
+
+def enqueue_image_processing(instance, max_size, renditions=None,
+                             image_field='image',
+                             renditions_field='image_renditions'):
+    submit_job(process_image, instance._meta.label, instance.pk, image_field,
+               getattr(instance, image_field).name, max_size, renditions,
+               renditions_field)
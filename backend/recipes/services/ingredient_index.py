@@ -0,0 +1,108 @@
+import bisect
+import itertools
+import re
+import threading
+
+from recipes.models import Ingredient
+from recipes.services.catalog import INGREDIENTS_VERSION_KEY
+from recipes.services.versions import get_version
+
+WORD_START = re.compile(r'\b\w')
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е')
+
+
+def iter_prefix(keys, prefix):
+    start = bisect.bisect_left(keys, (prefix,))
+    for key, ingredient_id in itertools.islice(keys, start, None):
+        if not key.startswith(prefix):
+            break
+        yield ingredient_id
+
+
+class IngredientIndex:
+    def __init__(self, ingredients):
+        self.items = {}
+        # (название, id) и (название с начала второго и далее слов, id).
+        self.keys = []
+        self.word_keys = []
+        for ingredient in ingredients:
+            name = normalize(ingredient['name'])
+            self.items[ingredient['id']] = ingredient
+            self.keys.append((name, ingredient['id']))
+            self.word_keys.extend(
+                (name[match.start():], ingredient['id'])
+                for match in WORD_START.finditer(name) if match.start()
+            )
+        self.keys.sort()
+        self.word_keys.sort()
+        self.positions = {
+            ingredient_id: position
+            for position, (_, ingredient_id) in enumerate(self.keys)
+        }
+        # Все названия в одной строке: поиск подстроки идёт через str.find,
+        # а не циклом по названиям.
+        self.haystack = '\n'.join(name for name, _ in self.keys)
+        self.offsets = list(itertools.accumulate(
+            (len(name) + 1 for name, _ in self.keys[:-1]), initial=0))
+
+    def iter_substring(self, query):
+        position = self.haystack.find(query)
+        while position != -1:
+            key = bisect.bisect_right(self.offsets, position) - 1
+            yield self.keys[key][1]
+            position = self.haystack.find(
+                query, self.offsets[key + 1] if key + 1 < len(self.offsets)
+                else len(self.haystack))
+
+    def search(self, query, limit=None, ranked=True):
+        query = normalize(query).replace('\n', ' ')
+        ids = iter_prefix(self.keys, query)
+        if ranked:
+            ids = itertools.chain(
+                ids,
+                sorted(set(iter_prefix(self.word_keys, query)),
+                       key=self.positions.__getitem__),
+                self.iter_substring(query),
+            )
+        result = []
+        seen = set()
+        for ingredient_id in ids:
+            if len(result) == limit:
+                break
+            if ingredient_id not in seen:
+                seen.add(ingredient_id)
+                result.append(self.items[ingredient_id])
+        return result
+
+
+_index = None
+_index_version = None
+_build_lock = threading.Lock()
+
+
+def get_index():
+    global _index, _index_version
+    version = get_version(INGREDIENTS_VERSION_KEY)
+    if _index_version == version:
+        return _index
+    # Пока индекс строит другой поток, запрос обслуживает БД.
+    if not _build_lock.acquire(blocking=_index is None):
+        return None
+    try:
+        if _index_version != version:
+            _index = IngredientIndex(Ingredient.objects.values(
+                'id', 'name', 'measurement_unit').iterator())
+            _index_version = version
+    finally:
+        _build_lock.release()
+    return _index
+
+
+def search_ingredients(query, limit=None, ranked=True):
+    index = get_index()
+    if index is None:
+        return None
+    return index.search(query, limit, ranked)
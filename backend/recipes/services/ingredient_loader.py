@@ -0,0 +1,123 @@
+import csv
+import itertools
+import json
+import os
+import re
+
+from django.db import transaction
+
+from recipes.constants import INGREDIENT_LENGTH, MEASURMENT_LENGTH
+from recipes.models import Ingredient
+
+BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+FORMATS = ('json', 'ndjson', 'csv')
+SEPARATORS_RE = re.compile(r'[\s,]*')
+CSV_HEADER = ['name', 'measurement_unit']
+
+
+def get_format(path):
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return 'ndjson' if extension == 'jsonl' else extension
+
+
+def iter_json_array(file):
+    # Массив читается кусками, в памяти держится только текущий объект.
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Ожидается JSON-массив.')
+    position = 1
+    while True:
+        position = SEPARATORS_RE.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(READ_SIZE)
+            if not chunk:
+                raise
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item
+
+
+def iter_ndjson(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_csv(file):
+    for row in csv.reader(file):
+        if row and row != CSV_HEADER:
+            yield dict(zip(CSV_HEADER, row))
+
+
+def read_ingredients(file, data_format):
+    if data_format == 'csv':
+        return iter_csv(file)
+    if data_format == 'ndjson':
+        return iter_ndjson(file)
+    # В .json может оказаться и NDJSON: смотрим на первый символ.
+    first = file.read(1)
+    while first.isspace():
+        first = file.read(1)
+    file.seek(0)
+    return iter_json_array(file) if first == '[' else iter_ndjson(file)
+
+
+def clean_row(row):
+    try:
+        name = str(row['name']).strip()
+        measurement_unit = str(row['measurement_unit']).strip()
+    except (KeyError, TypeError):
+        return None
+    if (not name or not measurement_unit
+            or len(name) > INGREDIENT_LENGTH
+            or len(measurement_unit) > MEASURMENT_LENGTH):
+        return None
+    return name, measurement_unit
+
+
+def load_batch(rows, update):
+    stats = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    batch = {}
+    for row in rows:
+        cleaned = clean_row(row)
+        if cleaned is None or cleaned[0] in batch:
+            stats['skipped'] += 1
+        if cleaned is not None:
+            batch[cleaned[0]] = cleaned[1]
+    existing = dict(Ingredient.objects.filter(
+        name__in=batch).values_list('name', 'measurement_unit'))
+    objs = []
+    for name, measurement_unit in batch.items():
+        if name not in existing:
+            stats['inserted'] += 1
+        elif update and existing[name] != measurement_unit:
+            stats['updated'] += 1
+        else:
+            stats['skipped'] += 1
+            continue
+        objs.append(Ingredient(name=name, measurement_unit=measurement_unit))
+    if update:
+        Ingredient.objects.bulk_create(
+            objs, update_conflicts=True, unique_fields=['name'],
+            update_fields=['measurement_unit'])
+    else:
+        Ingredient.objects.bulk_create(objs, ignore_conflicts=True)
+    return stats
+
+
+def load_ingredients(rows, batch_size=BATCH_SIZE, update=True):
+    # Каждая пачка в своей транзакции: ошибка не откатывает
+    # уже загруженные пачки.
+    stats = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, batch_size)):
+        with transaction.atomic():
+            for key, value in load_batch(batch, update).items():
+                stats[key] += value
+    return stats
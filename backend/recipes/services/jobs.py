@@ -0,0 +1,37 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger('foodgram_logger')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                thread_name_prefix='foodgram-jobs'
+            )
+    return _executor
+
+
+def run_job(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Фоновая задача %s упала', func.__name__)
+    finally:
+        connections.close_all()
+
+
+def submit_job(func, *args):
+    # Задача видит данные запроса только после коммита транзакции.
+    transaction.on_commit(
+        lambda: get_executor().submit(run_job, func, *args))
@@ -0,0 +1,68 @@
+from django.core.cache import caches
+
+from recipes.services.catalog import INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY
+from recipes.services.versions import bump_version_on_commit, get_versions
+
+RECIPE_CACHE = 'recipe'
+# Общая версия сбрасывает кэш всех рецептов после массовой загрузки:
+# bulk_create не отправляет сигналы.
+RECIPES_VERSION_KEY = 'recipes_version'
+RECIPE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def recipe_version_key(recipe_id):
+    return f'recipe_version:{recipe_id}'
+
+
+def user_version_key(user_id):
+    return f'user_version:{user_id}'
+
+
+def bump_recipe_version(recipe_id):
+    bump_version_on_commit(recipe_version_key(recipe_id))
+
+
+def bump_user_version(user_id):
+    bump_version_on_commit(user_version_key(user_id))
+
+
+def bump_recipes_version():
+    bump_version_on_commit(RECIPES_VERSION_KEY)
+
+
+def get_recipes_data(rows, rendition, serialize):
+    # Кэшируется независимая от зрителя часть представления рецепта.
+    # Ключ включает версии рецепта, автора и справочников, поэтому
+    # устаревшие записи просто перестают читаться.
+    # rows — словари с id и author_id, serialize(ids) -> {id: data}.
+    # Возвращает {id: data}; удалённых за это время рецептов в нём нет.
+    versions = get_versions(list({
+        TAGS_VERSION_KEY, INGREDIENTS_VERSION_KEY, RECIPES_VERSION_KEY,
+        *(recipe_version_key(row['id']) for row in rows),
+        *(user_version_key(row['author_id']) for row in rows),
+    }))
+    catalog = (f'{versions[TAGS_VERSION_KEY]}:'
+               f'{versions[INGREDIENTS_VERSION_KEY]}:'
+               f'{versions[RECIPES_VERSION_KEY]}')
+    keys = {
+        row['id']: (
+            f'recipe:{rendition}:{row["id"]}:'
+            f'{versions[recipe_version_key(row["id"])]}:'
+            f'{versions[user_version_key(row["author_id"])]}:{catalog}'
+        )
+        for row in rows
+    }
+    cache = caches[RECIPE_CACHE]
+    cached = cache.get_many(list(keys.values()))
+    data = {
+        recipe_id: cached[key]
+        for recipe_id, key in keys.items() if key in cached
+    }
+    missing = [recipe_id for recipe_id in keys if recipe_id not in data]
+    if missing:
+        fresh = serialize(missing)
+        cache.set_many({
+            keys[recipe_id]: item for recipe_id, item in fresh.items()
+        }, RECIPE_CACHE_TIMEOUT)
+        data.update(fresh)
+    return data
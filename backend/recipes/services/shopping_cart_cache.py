@@ -0,0 +1,73 @@
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, quote_etag
+)
+from django.utils.http import http_date
+
+from recipes.services.catalog import INGREDIENTS_VERSION_KEY
+from recipes.services.versions import bump_version_on_commit, get_versions
+
+EXPORT_CACHE = 'export'
+EXPORT_CACHE_TIMEOUT = 60 * 60 * 24
+# Выгрузки больше этого размера не кэшируются.
+EXPORT_CACHE_MAX_SIZE = 2 * 1024 * 1024
+
+
+def get_cart_version_key(user_id):
+    return f'shopping_cart_version:{user_id}'
+
+
+def get_cart_version(user_id):
+    # В выгрузке есть названия и единицы ингредиентов: их правка тоже
+    # меняет версию. Берём большую из двух, это время последнего изменения.
+    key = get_cart_version_key(user_id)
+    versions = get_versions([key, INGREDIENTS_VERSION_KEY])
+    return max(versions[key], versions[INGREDIENTS_VERSION_KEY])
+
+
+def bump_cart_version(user_id):
+    bump_version_on_commit(get_cart_version_key(user_id))
+
+
+def cache_streaming_content(response, key):
+    content = response.streaming_content
+
+    def tee():
+        chunks = []
+        size = 0
+        for chunk in content:
+            yield chunk
+            size += len(chunk)
+            if size <= EXPORT_CACHE_MAX_SIZE:
+                chunks.append(chunk)
+            else:
+                chunks.clear()
+        if size <= EXPORT_CACHE_MAX_SIZE:
+            caches[EXPORT_CACHE].set(key, b''.join(chunks),
+                                     EXPORT_CACHE_TIMEOUT)
+
+    response.streaming_content = tee()
+    return response
+
+
+def export_shopping_cart(request, exporter):
+    user = request.user
+    version = get_cart_version(user.id)
+    etag = quote_etag(f'{user.id}-{exporter.format}-{version}')
+    last_modified = version // 10 ** 9
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        key = f'shopping_cart_export:{user.id}:{exporter.format}:{version}'
+        content = caches[EXPORT_CACHE].get(key)
+        if content is None:
+            response = cache_streaming_content(exporter.export(user), key)
+        else:
+            response = HttpResponse(content,
+                                    content_type=exporter.content_type)
+            response['Content-Disposition'] = exporter.content_disposition
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
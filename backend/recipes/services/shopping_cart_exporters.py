@@ -0,0 +1,113 @@
+import csv
+import itertools
+import json
+
+from django.http import StreamingHttpResponse
+
+from recipes.services.generate_shopping_cart import (
+    generate_shopping_cart_pdf, get_shopping_cart_ingredients
+)
+
+# Строки отдаются пачками, чтобы не писать в сокет по одной строке.
+CHUNK_LINES = 200
+
+EXPORTERS = {}
+
+
+def register_exporter(exporter_class):
+    EXPORTERS[exporter_class.format] = exporter_class()
+    return exporter_class
+
+
+def get_exporter(export_format):
+    return EXPORTERS[export_format]
+
+
+def chunked(lines):
+    lines = iter(lines)
+    while chunk := ''.join(itertools.islice(lines, CHUNK_LINES)):
+        yield chunk
+
+
+class ShoppingCartExporter:
+    format = None
+    media_type = None
+    charset = 'utf-8'
+
+    @property
+    def content_type(self):
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+    @property
+    def content_disposition(self):
+        return f'attachment; filename="shopping_list.{self.format}"'
+
+    def export(self, user):
+        response = StreamingHttpResponse(
+            chunked(self.render(get_shopping_cart_ingredients(user)
+                                .iterator())),
+            content_type=self.content_type
+        )
+        response['Content-Disposition'] = self.content_disposition
+        return response
+
+    def render(self, ingredients):
+        raise NotImplementedError
+
+
+@register_exporter
+class PdfExporter(ShoppingCartExporter):
+    format = 'pdf'
+    media_type = 'application/pdf'
+    charset = None
+
+    def export(self, user):
+        return generate_shopping_cart_pdf(user)
+
+
+@register_exporter
+class TextExporter(ShoppingCartExporter):
+    format = 'txt'
+    media_type = 'text/plain'
+
+    def render(self, ingredients):
+        yield 'Список ингредиентов\n\n'
+        for i, item in enumerate(ingredients, 1):
+            yield (f'<{i}> {item["name"]} - {item["total_amount"]}, '
+                   f'{item["measurement_unit"]}\n')
+
+
+class LineBuffer:
+    def write(self, value):
+        return value
+
+
+@register_exporter
+class CsvExporter(ShoppingCartExporter):
+    format = 'csv'
+    media_type = 'text/csv'
+
+    def render(self, ingredients):
+        writer = csv.writer(LineBuffer())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for item in ingredients:
+            yield writer.writerow((item['name'], item['measurement_unit'],
+                                   item['total_amount']))
+
+
+@register_exporter
+class JsonExporter(ShoppingCartExporter):
+    format = 'json'
+    media_type = 'application/json'
+
+    def render(self, ingredients):
+        yield '['
+        for i, item in enumerate(ingredients):
+            yield (',' if i else '') + json.dumps({
+                'name': item['name'],
+                'measurement_unit': item['measurement_unit'],
+                'amount': item['total_amount'],
+            }, ensure_ascii=False)
+        yield ']'
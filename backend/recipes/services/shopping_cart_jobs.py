@@ -0,0 +1,66 @@
+import datetime
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from recipes.models import ShoppingCartExport
+from recipes.services.jobs import submit_job
+from recipes.services.shopping_cart_cache import get_cart_version
+from recipes.services.shopping_cart_exporters import get_exporter
+
+Status = ShoppingCartExport.Status
+
+
+def enqueue_export(user, export_format):
+    version = get_cart_version(user.id)
+    job = ShoppingCartExport.objects.filter(
+        user=user, format=export_format, cart_version=version,
+        status__in=(Status.PENDING, Status.RUNNING, Status.DONE)
+    ).first()
+    if job is None or is_stale(job):
+        job = ShoppingCartExport.objects.create(
+            user=user, format=export_format, cart_version=version)
+        submit_job(render_export, job.id)
+    return job
+
+
+def is_stale(job):
+    # Задачи, потерянные при перезапуске воркера, не висят вечно.
+    timeout = datetime.timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+    return (job.status in (Status.PENDING, Status.RUNNING)
+            and job.created < timezone.now() - timeout)
+
+
+def get_export(user, job_id):
+    job = ShoppingCartExport.objects.filter(user=user, pk=job_id).first()
+    if job is not None and is_stale(job):
+        job.status = Status.FAILED
+        job.save(update_fields=('status',))
+    return job
+
+
+def render_export(job_id):
+    job = ShoppingCartExport.objects.select_related('user').get(pk=job_id)
+    job.status = Status.RUNNING
+    job.save(update_fields=('status',))
+    try:
+        response = get_exporter(job.format).export(job.user)
+        with tempfile.TemporaryFile() as file:
+            for chunk in response.streaming_content:
+                file.write(chunk)
+            response.close()
+            file.seek(0)
+            job.file.save(f'{job.id}.{job.format}', File(file), save=False)
+    except Exception:
+        job.status = Status.FAILED
+        job.save(update_fields=('status',))
+        raise
+    job.status = Status.DONE
+    job.save(update_fields=('status', 'file'))
+    for old_job in ShoppingCartExport.objects.filter(
+            user=job.user_id, format=job.format, status=Status.DONE
+    ).exclude(pk=job.pk):
+        old_job.delete()
+        old_job.file.storage.delete(old_job.file.name)
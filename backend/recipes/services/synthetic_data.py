@@ -0,0 +1,88 @@
+import random
+
+from django.contrib.auth import get_user_model, hashers
+
+from recipes.models import (
+    Favorite, Ingredient, IngredientInRecipe, Recipe, ShoppingList, Tag
+)
+from recipes.services.catalog import (
+    bump_ingredients_version, bump_tags_version
+)
+from recipes.services.counters import recount_counters
+from recipes.services.recipe_cache import bump_recipes_version
+from users.models import Follow
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+SYNTHETIC_PASSWORD = 'synthetic-password'
+
+
+def generate_synthetic_data(users=20, recipes=200, tags=8, ingredients=300,
+                            ingredients_per_recipe=8, tags_per_recipe=2,
+                            follows=5, favorites=10, carts=5, seed=0,
+                            prefix='synthetic'):
+    rng = random.Random(seed)
+    password = hashers.make_password(SYNTHETIC_PASSWORD)
+
+    user_objs = User.objects.bulk_create([
+        User(username=f'{prefix}_{i}', email=f'{prefix}_{i}@example.com',
+             first_name=f'Имя {i}', last_name=f'Фамилия {i}',
+             password=password)
+        for i in range(users)
+    ], batch_size=BATCH_SIZE)
+    tag_objs = Tag.objects.bulk_create([
+        Tag(name=f'{prefix} тэг {i}', slug=f'{prefix}-{i}')
+        for i in range(tags)
+    ], batch_size=BATCH_SIZE)
+    ingredient_objs = Ingredient.objects.bulk_create([
+        Ingredient(name=f'{prefix} ингредиент {i}',
+                   measurement_unit=rng.choice(('г', 'мл', 'шт.')))
+        for i in range(ingredients)
+    ], batch_size=BATCH_SIZE)
+    recipe_objs = Recipe.objects.bulk_create([
+        Recipe(author=rng.choice(user_objs), name=f'{prefix} рецепт {i}',
+               text=f'Описание рецепта {i}',
+               cooking_time=rng.randint(1, 180))
+        for i in range(recipes)
+    ], batch_size=BATCH_SIZE)
+
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipe_objs
+        for tag in rng.sample(tag_objs, min(tags_per_recipe, len(tag_objs)))
+    ], batch_size=BATCH_SIZE)
+    IngredientInRecipe.objects.bulk_create([
+        IngredientInRecipe(recipe=recipe, ingredient=ingredient,
+                           amount=rng.randint(1, 500))
+        for recipe in recipe_objs
+        for ingredient in rng.sample(
+            ingredient_objs,
+            min(ingredients_per_recipe, len(ingredient_objs)))
+    ], batch_size=BATCH_SIZE)
+
+    Follow.objects.bulk_create([
+        Follow(subscriber=user, user=author)
+        for user in user_objs
+        for author in rng.sample(
+            [other for other in user_objs if other != user],
+            min(follows, len(user_objs) - 1))
+    ], batch_size=BATCH_SIZE)
+    for model, per_user in ((Favorite, favorites), (ShoppingList, carts)):
+        model.objects.bulk_create([
+            model(user=user, recipe=recipe)
+            for user in user_objs
+            for recipe in rng.sample(recipe_objs,
+                                     min(per_user, len(recipe_objs)))
+        ], batch_size=BATCH_SIZE)
+    recount_counters(Recipe, User, Favorite, ShoppingList, Follow)
+    bump_ingredients_version()
+    bump_tags_version()
+    bump_recipes_version()
+
+    return {
+        'users': user_objs,
+        'tags': tag_objs,
+        'ingredients': ingredient_objs,
+        'recipes': recipe_objs,
+    }
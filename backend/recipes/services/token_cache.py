@@ -0,0 +1,33 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+TOKEN_CACHE = 'session'
+
+
+def get_token_cache_key(key):
+    # Сам токен в ключ кэша не попадает.
+    return f'auth_token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def get_cached_token(key):
+    return caches[TOKEN_CACHE].get(get_token_cache_key(key))
+
+
+def cache_token(key, user, token):
+    caches[TOKEN_CACHE].set(get_token_cache_key(key), (user, token),
+                            settings.AUTH_TOKEN_CACHE_TIMEOUT)
+
+
+def invalidate_token(key):
+    cache_key = get_token_cache_key(key)
+    transaction.on_commit(lambda: caches[TOKEN_CACHE].delete(cache_key))
+
+
+def invalidate_user_tokens(user_id):
+    for key in Token.objects.filter(user_id=user_id).values_list(
+            'key', flat=True):
+        invalidate_token(key)
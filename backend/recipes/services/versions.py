@@ -0,0 +1,34 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Версии лежат в кэше default, данные — в именованных кэшах: вытеснение
+# данных не сбрасывает версии, а потеря версии лишь делает кэш холодным.
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = bump_version(key)
+    return version
+
+
+def get_versions(keys):
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return versions
+
+
+def bump_version(key):
+    # Время в наносекундах одновременно служит версией и Last-Modified.
+    version = time.time_ns()
+    cache.set(key, version, timeout=None)
+    return version
+
+
+def bump_version_on_commit(key):
+    transaction.on_commit(lambda: bump_version(key))
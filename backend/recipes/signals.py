@@ -0,0 +1,143 @@
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_save
+)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (
+    Favorite, Ingredient, IngredientInRecipe, Recipe, ShoppingList, Tag
+)
+from recipes.services.catalog import (
+    bump_ingredients_version, bump_tags_version
+)
+from recipes.services.counters import increment
+from recipes.services.images import image_processed
+from recipes.services.recipe_cache import (
+    bump_recipe_version, bump_user_version
+)
+from users.models import Follow, User
+from recipes.services.shopping_cart_cache import bump_cart_version
+from recipes.services.token_cache import (
+    invalidate_token, invalidate_user_tokens
+)
+
+
+def bump_recipe_carts(recipe_id):
+    for user_id in ShoppingList.objects.filter(
+            recipe_id=recipe_id).values_list('user_id', flat=True):
+        bump_cart_version(user_id)
+
+
+def get_delta(signal, created=True):
+    if signal is post_delete:
+        return -1
+    return 1 if created else 0
+
+
+@receiver((post_save, post_delete), sender=ShoppingList)
+def shopping_list_changed(sender, instance, signal, created=True, **kwargs):
+    bump_cart_version(instance.user_id)
+    delta = get_delta(signal, created)
+    if delta:
+        increment(Recipe.objects.filter(pk=instance.recipe_id),
+                  'shopping_carts_count', delta)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+def favorite_changed(sender, instance, signal, created=True, **kwargs):
+    delta = get_delta(signal, created)
+    if delta:
+        increment(Recipe.objects.filter(pk=instance.recipe_id),
+                  'favorites_count', delta)
+
+
+@receiver((post_save, post_delete), sender=Follow)
+def follow_changed(sender, instance, signal, created=True, **kwargs):
+    delta = get_delta(signal, created)
+    if delta:
+        increment(User.objects.filter(pk=instance.user_id),
+                  'followers_count', delta)
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_author_changed(sender, instance, update_fields=None, **kwargs):
+    # Смена автора через админку переносит рецепт в счётчике.
+    if instance.pk is None or (
+            update_fields is not None and 'author' not in update_fields):
+        return
+    old_author_id = Recipe.objects.filter(pk=instance.pk).values_list(
+        'author_id', flat=True).first()
+    if old_author_id is not None and old_author_id != instance.author_id:
+        increment(User.objects.filter(pk=old_author_id), 'recipes_count', -1)
+        increment(User.objects.filter(pk=instance.author_id),
+                  'recipes_count', 1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    bump_recipe_version(instance.id)
+    if created:
+        increment(User.objects.filter(pk=instance.author_id),
+                  'recipes_count', 1)
+    else:
+        bump_recipe_carts(instance.id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    bump_recipe_version(instance.id)
+    increment(User.objects.filter(pk=instance.author_id), 'recipes_count', -1)
+
+
+@receiver((post_save, post_delete), sender=IngredientInRecipe)
+def ingredient_in_recipe_changed(sender, instance, **kwargs):
+    bump_recipe_version(instance.recipe_id)
+    bump_recipe_carts(instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Рецепты меняют со стороны тега только в админке:
+        # проще сбросить версию тегов, она входит в ключ всех рецептов.
+        bump_tags_version()
+    else:
+        bump_recipe_version(instance.id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Вход обновляет только last_login: автор в рецептах от этого не меняется.
+    if update_fields != frozenset(('last_login',)):
+        bump_user_version(instance.id)
+        # Смена пароля, деактивация и правка профиля.
+        invalidate_user_tokens(instance.id)
+
+
+@receiver(image_processed, sender=Recipe)
+def recipe_image_processed(sender, pk, **kwargs):
+    bump_recipe_version(pk)
+
+
+@receiver(image_processed, sender=User)
+def user_image_processed(sender, pk, **kwargs):
+    bump_user_version(pk)
+    invalidate_user_tokens(pk)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # Выход (djoser удаляет токен) и удаление пользователя.
+    invalidate_token(instance.key)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_changed(sender, **kwargs):
+    bump_ingredients_version()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, **kwargs):
+    bump_tags_version()
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import time
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+
+# Файл моложе этого (секунды) при удалении оставляется для gc_media:
+# его могла только что получить незакоммиченная запись.
+DELETE_GRACE_PERIOD = 10 * 60
+
+
+def get_reference_lookups():
+    # Все поля, через которые записи ссылаются на файлы: FileField
+    # и дополнительные lookup'ы модели (например, уменьшенные копии в JSON).
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField) and isinstance(
+                    field.storage, ContentAddressedStorage):
+                yield model, field.name
+        for lookup in getattr(model, 'file_reference_lookups', ()):
+            yield model, lookup
+
+
+def is_referenced(name):
+    return any(
+        model._default_manager.filter(**{lookup: name}).exists()
+        for model, lookup in get_reference_lookups()
+    )
+
+
+def get_referenced_names():
+    names = set()
+    for model, lookup in get_reference_lookups():
+        names.update(model._default_manager.exclude(
+            **{f'{lookup}__isnull': True}
+        ).values_list(lookup, flat=True))
+    return names
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    # Имя файла — sha256 содержимого: одинаковые загрузки хранятся
+    # одним файлом, а URL никогда не меняет содержимое.
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content_hash = digest.hexdigest()
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, content_hash[:2],
+                            f'{content_hash}{extension}')
+
+    def _save(self, name, content):
+        name = self.get_content_name(name, content)
+        try:
+            # Совпавший файл достаётся новой записи: обновлённое время
+            # изменения не даёт удалить его, пока она не закоммичена.
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return super()._save(name, content)
+        return name
+
+    def delete(self, name):
+        # Счётчика ссылок нет: вместо него после коммита проверяется, что
+        # на файл не ссылается ни одна запись. Свежий файл мог получить
+        # ещё не закоммиченный дубликат, его оставляем для gc_media.
+        if name:
+            transaction.on_commit(lambda: self.delete_unreferenced(name))
+
+    def delete_unreferenced(self, name, modified_before=None):
+        # modified_before — время изменения файла, которое видел вызывающий:
+        # более позднее значит, что файл с тех пор достался другой записи.
+        if modified_before is None:
+            modified_before = time.time() - DELETE_GRACE_PERIOD
+        try:
+            if os.path.getmtime(self.path(name)) > modified_before:
+                return
+        except FileNotFoundError:
+            return
+        if not is_referenced(name):
+            super().delete(name)
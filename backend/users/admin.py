@@ -11,7 +11,7 @@ class UserAdmin(DjangoUserAdmin):
         'first_name',
         'last_name',
         'recipes_count',
-        'subscriptions_count'
+        'followers_count'
     )
     list_display_links = ('username',)
     search_fields = ('username',)
@@ -24,16 +24,6 @@ class UserAdmin(DjangoUserAdmin):
     list_fields = ('first_name',)
     empty_value_display = 'Не задано'
 
-    def recipes_count(self, obj):
-        return obj.recipe.count()
-
-    recipes_count.short_description = 'Кол-во рецептов'
-
-    def subscriptions_count(self, obj):
-        return obj.subscriber.count()
-
-    subscriptions_count.short_description = 'Кол-во подписчиков'
-
 
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
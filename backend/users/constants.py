@@ -1,3 +1,4 @@
 EMAIL_LENGTH = 254
 NAME_LENGTH = 150
 ROLE_LENGTH = 10
+AVATAR_MAX_SIZE = (512, 512)
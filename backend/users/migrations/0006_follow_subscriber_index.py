@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['subscriber', 'user'], name='follow_subscriber_user_idx'),
+        ),
+    ]
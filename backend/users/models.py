@@ -4,11 +4,13 @@ from django.db import models
 from django.db.models import CheckConstraint, UniqueConstraint
 from django.utils.translation import gettext_lazy
 
+from recipes.services.counters import CountersMixin
 from users.constants import (EMAIL_LENGTH, NAME_LENGTH, ROLE_LENGTH)
 from users.validators import combined_username_validator
 
 
-class User(AbstractUser):
+class User(CountersMixin, AbstractUser):
+    counter_fields = ('recipes_count', 'followers_count')
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = [
         'first_name',
@@ -51,6 +53,16 @@ class User(AbstractUser):
         default=Roles.USER,
         choices=Roles.choices,
     )
+    recipes_count = models.PositiveIntegerField(
+        'Кол-во рецептов',
+        default=0,
+        editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'Кол-во подписчиков',
+        default=0,
+        editable=False
+    )
 
     @property
     def avatar_url(self):
@@ -107,6 +119,12 @@ class Follow(models.Model):
                 check=~models.Q(user=models.F('subscriber')),
             ),
         ]
+        # Уникальное ограничение начинается с user, а подписки и
+        # is_subscribed ищутся по subscriber.
+        indexes = [
+            models.Index(fields=['subscriber', 'user'],
+                         name='follow_subscriber_user_idx'),
+        ]
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
 